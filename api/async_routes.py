@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from db_config.async_connexion import async_session_scope
+from domain.client_app import AsyncClientApp
+from domain.contract_app import AsyncContractApp
+from domain.event_app import AsyncEventApp
+from domain.user_app import AsyncUserApp
+from domain.version_app import AsyncVersionApp
+from models.models import ResourceTypeEnum
+
+from .dependencies import (check_etag, decode_token, oauth2_scheme, or_404,
+                           page_params)
+from .serializers import Client, Contract, Event, Page, User
+
+# Read endpoints served natively on the event loop (API_MODE=async). Objects
+# are serialized once the handler has returned, so every relationship the
+# serializers touch must come from the "api-detail" eager-loading profile.
+async_read_router = APIRouter()
+
+
+async def get_async_session():
+    async with async_session_scope() as session:
+        yield session
+
+
+async def get_async_event_domain(session=Depends(get_async_session)):
+    return AsyncEventApp(session)
+
+
+async def get_async_contract_domain(session=Depends(get_async_session)):
+    return AsyncContractApp(session)
+
+
+async def get_async_client_domain(session=Depends(get_async_session)):
+    return AsyncClientApp(session)
+
+
+async def get_async_user_domain(session=Depends(get_async_session)):
+    return AsyncUserApp(session)
+
+
+async def get_async_version_domain(session=Depends(get_async_session)):
+    return AsyncVersionApp(session)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), user_domain: AsyncUserApp = Depends(get_async_user_domain)):
+    user_id, username = decode_token(token)
+    user = await user_domain.jwt_snapshot(user_id, username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Utilisateur inconnu",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def list_etag(resource_type: ResourceTypeEnum):
+    async def check(request: Request, response: Response, page: dict = Depends(page_params),
+                    current_user=Depends(get_current_user),
+                    version_domain: AsyncVersionApp = Depends(get_async_version_domain)):
+        check_etag(request, response, await version_domain.list_etag(resource_type, **page))
+    return check
+
+
+def detail_etag(resource_type: ResourceTypeEnum):
+    async def check(id: int, request: Request, response: Response, current_user=Depends(get_current_user),
+                    version_domain: AsyncVersionApp = Depends(get_async_version_domain)):
+        check_etag(request, response, await version_domain.detail_etag(resource_type, id))
+    return check
+
+
+@async_read_router.get("/events/", response_model=Page[Event], tags=['events',], dependencies=[Depends(list_etag(ResourceTypeEnum.EVENT))])
+async def list_events(page: dict = Depends(page_params), event_domain: AsyncEventApp = Depends(get_async_event_domain), current_user: User = Depends(get_current_user)):
+    return (await event_domain.list_all_events(**page, profile="api-detail"))._asdict()
+
+
+@async_read_router.get("/clients/", response_model=Page[Client], tags=['clients',], dependencies=[Depends(list_etag(ResourceTypeEnum.CLIENT))])
+async def list_clients(page: dict = Depends(page_params), client_domain: AsyncClientApp = Depends(get_async_client_domain), current_user: User = Depends(get_current_user)):
+    return (await client_domain.list_all_clients(**page, profile="api-detail"))._asdict()
+
+
+@async_read_router.get("/contracts/", response_model=Page[Contract], tags=['contrats',], dependencies=[Depends(list_etag(ResourceTypeEnum.CONTRACT))])
+async def list_contracts(page: dict = Depends(page_params), contract_domain: AsyncContractApp = Depends(get_async_contract_domain), current_user: User = Depends(get_current_user)):
+    return (await contract_domain.list_all_contracts(**page, profile="api-detail"))._asdict()
+
+
+@async_read_router.get("/event/{id}", response_model=Event, tags=['events',], dependencies=[Depends(detail_etag(ResourceTypeEnum.EVENT))])
+async def get_event(id: int, event_domain: AsyncEventApp = Depends(get_async_event_domain), current_user: User = Depends(get_current_user)):
+    return or_404(await event_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun événement avec cet id.")
+
+
+@async_read_router.get("/client/{id}", response_model=Client, tags=['clients',], dependencies=[Depends(detail_etag(ResourceTypeEnum.CLIENT))])
+async def get_client(id: int, client_domain: AsyncClientApp = Depends(get_async_client_domain), current_user: User = Depends(get_current_user)):
+    return or_404(await client_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun client avec cet id.")
+
+
+@async_read_router.get("/contract/{id}", response_model=Contract, tags=['contrats',], dependencies=[Depends(detail_etag(ResourceTypeEnum.CONTRACT))])
+async def get_contract(id: int, contract_domain: AsyncContractApp = Depends(get_async_contract_domain), current_user: User = Depends(get_current_user)):
+    return or_404(await contract_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun contrat avec cet id.")
+
+
+@async_read_router.get("/user/{id}", response_model=User, tags=['users',], dependencies=[Depends(detail_etag(ResourceTypeEnum.USER))])
+async def get_user(id: int, user_domain: AsyncUserApp = Depends(get_async_user_domain), current_user: User = Depends(get_current_user)):
+    return or_404(await user_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun utilisateur avec cet id.")
@@ -0,0 +1,168 @@
+import os
+from typing import Optional
+
+import jwt
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.security import OAuth2PasswordBearer
+
+from db_config.connexion import session_scope
+from domain.batch_app import BatchApp
+from domain.client_app import ClientApp
+from domain.contract_app import ContractApp
+from domain.event_app import EventApp
+from domain.import_app import ImportApp
+from domain.report_app import ReportApp
+from domain.search_app import SearchApp
+from domain.user_app import UserApp
+from domain.version_app import VersionApp
+from models.models import PermissionTypeEnum, ResourceTypeEnum
+from repositories.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+secret = os.environ.get("JWT_SECRET")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="get_token")
+
+
+def get_session():
+    with session_scope() as session:
+        yield session
+
+
+def get_event_domain(session=Depends(get_session)):
+    return EventApp(session)
+
+
+def get_contract_domain(session=Depends(get_session)):
+    return ContractApp(session)
+
+
+def get_client_domain(session=Depends(get_session)):
+    return ClientApp(session)
+
+
+def get_user_domain(session=Depends(get_session)):
+    return UserApp(session)
+
+
+def get_import_domain(session=Depends(get_session)):
+    return ImportApp(session)
+
+
+def get_batch_domain(session=Depends(get_session)):
+    return BatchApp(session)
+
+
+def get_report_domain(session=Depends(get_session)):
+    return ReportApp(session)
+
+
+def get_search_domain(session=Depends(get_session)):
+    return SearchApp(session)
+
+
+def get_version_domain(session=Depends(get_session)):
+    return VersionApp(session)
+
+
+def decode_token(token):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token invalide ou expiré",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    try:
+        payload = jwt.decode(token, key=secret, algorithms=["HS256"])
+        user_id: int = payload.get("id")
+        username: str = payload.get("username")
+        if user_id is None or username is None:
+            raise credentials_exception
+    except jwt.InvalidTokenError:
+        raise credentials_exception
+    return user_id, username
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), user_domain: UserApp = Depends(get_user_domain)):
+    user_id, username = decode_token(token)
+    user = user_domain.jwt_snapshot(user_id, username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Utilisateur inconnu",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def require_permission(resource_type: ResourceTypeEnum, permission_type: PermissionTypeEnum):
+    def check_permission(current_user=Depends(get_current_user), user_domain: UserApp = Depends(get_user_domain)):
+        if not user_domain.has_permission(current_user, resource_type, permission_type):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous n'êtes pas autorisé à effectuer cette action sur cette ressource.",
+            )
+        return current_user
+    return check_permission
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def check_etag(request: Request, response: Response, etag):
+    # An unchanged resource is answered before the route runs: no list query,
+    # no serialization.
+    if etag is None:
+        return
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def list_etag(resource_type: ResourceTypeEnum):
+    def check(request: Request, response: Response, page: dict = Depends(page_params),
+              current_user=Depends(get_current_user), version_domain: VersionApp = Depends(get_version_domain)):
+        check_etag(request, response, version_domain.list_etag(resource_type, **page))
+    return check
+
+
+def detail_etag(resource_type: ResourceTypeEnum):
+    def check(id: int, request: Request, response: Response, current_user=Depends(get_current_user),
+              version_domain: VersionApp = Depends(get_version_domain)):
+        check_etag(request, response, version_domain.detail_etag(resource_type, id))
+    return check
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="next_cursor de la page précédente"),
+):
+    return {"limit": limit, "after": after}
+
+
+def or_404(item, detail):
+    if not item:
+        raise HTTPException(status_code=404, detail=detail)
+    return item
+
+
+def get_event_or_404(id, event_domain):
+    return or_404(event_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun événement avec cet id.")
+
+
+def get_client_or_404(id, client_domain):
+    return or_404(client_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun client avec cet id.")
+
+
+def get_contract_or_404(id, contract_domain):
+    return or_404(contract_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun contrat avec cet id.")
+
+
+def get_user_or_404(id, user_domain):
+    return or_404(user_domain.get_by_id(id, "api-detail"),
+                  "Il n'existe aucun utilisateur avec cet id.")
@@ -0,0 +1,134 @@
+import threading
+import time
+from bisect import bisect_left
+
+from starlette.datastructures import MutableHeaders
+
+from db_config.connexion import track_queries
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield f"{self.name}{{{_labels(self.labels, labels)}}} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [count per bucket (+Inf last), sum]
+        self.values = {}
+
+    def observe(self, labels, value):
+        series = self.values.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in self.values.items():
+            label_text = _labels(self.labels, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+            yield f"{self.name}_count{{{label_text}}} {cumulative}"
+
+
+class Registry:
+    def __init__(self, *metrics):
+        self.metrics = metrics
+        self.lock = threading.Lock()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+request_duration = Histogram(
+    "tartala_http_request_duration_seconds", "Durée des requêtes HTTP, par route.",
+    ("method", "route", "status"))
+db_duration = Histogram(
+    "tartala_db_request_duration_seconds", "Temps passé en base par requête HTTP, par route.",
+    ("method", "route"))
+db_statements = Counter(
+    "tartala_db_statements_total", "Requêtes SQL exécutées, par route.",
+    ("method", "route"))
+registry = Registry(request_duration, db_duration, db_statements)
+
+
+def record(method, route, status, duration, stats):
+    with registry.lock:
+        request_duration.observe((method, route, status), duration)
+        db_duration.observe((method, route), stats.duration)
+        db_statements.inc((method, route), stats.count)
+
+
+def server_timing(stats, duration):
+    return (f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+            f"app;dur={duration * 1000:.2f}")
+
+
+class RequestMetricsMiddleware:
+    # Plain ASGI middleware: times every HTTP request, adds a Server-Timing
+    # header (SQL statements and database time so far, total time) and feeds
+    # the /metrics histograms once the response is complete. Routes are
+    # labelled by their path template, so /event/1 and /event/2 share a series.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = track_queries()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            record(scope["method"], route.path if route else "unmatched", status,
+                   time.perf_counter() - started, stats)
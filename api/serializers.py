@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, Generic, List, Literal, Optional, TypeVar, Union
 
 from pydantic import BaseModel, EmailStr
 
@@ -16,12 +16,21 @@ class Permission(BaseModel):
         from_attributes = True
 
 
+class Role(BaseModel):
+    department: DepartmentEnum
+    permissions: List[Permission] = []
+
+    class Config:
+        from_attributes = True
+
+
 class User(BaseModel):
     id: int
     name: str
     email: EmailStr
     username: str
     department: DepartmentEnum
+    role: Optional[Role] = None
     permissions: List[Permission] = []
 
     class Config:
@@ -46,8 +55,8 @@ class Resource(BaseModel):
     type: str
     creation_date: datetime
     modified_date: datetime
-    user_id: int
-    user: User
+    user_id: Optional[int] = None
+    user: Optional[User] = None
 
     class Config:
         from_attributes = True
@@ -58,10 +67,9 @@ class Contract(Resource):
     amount: int
     due_amount: int
     status: ContractStatusEnum
-    client_id: int
-    event_id: int
+    client_id: Optional[int] = None
+    event_id: Optional[int] = None
     client: Optional["Client"] = []
-    event: List["Event"] = []
 
 
 class Client(Resource):
@@ -81,6 +89,89 @@ class Event(Resource):
     location: str
     attendees: int
     notes: str
-    client_id: int
+    client_id: Optional[int] = None
     client: Optional[Client] = None
     contract: Optional[Contract] = None
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ImportRowError(BaseModel):
+    line: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    inserted: int
+    error_count: int
+    errors: List[ImportRowError]
+    last_line: int
+
+
+class SearchResult(BaseModel):
+    resource: str
+    id: int
+    title: Optional[str] = None
+    detail: Optional[str] = None
+    rank: float
+
+    class Config:
+        from_attributes = True
+
+
+class ReportLine(BaseModel):
+    key: Union[int, str, None] = None
+    label: Optional[str] = None
+    contract_count: int
+    total_amount: int
+    signed_amount: int
+    due_amount: int
+    rank: Optional[int] = None
+    signed_share: Optional[float] = None
+    cumulative_signed: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Report(BaseModel):
+    name: str
+    source: str
+    lines: List[ReportLine]
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = True
+
+
+class BatchItem(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BatchReport(BaseModel):
+    committed: bool
+    created: int
+    updated: int
+    deleted: int
+    error_count: int
+    results: List[BatchItem]
@@ -1,16 +1,38 @@
+import io
 import os
-from typing import List
 
 import jwt
-from fastapi import Depends, FastAPI, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import (APIRouter, Depends, FastAPI, HTTPException, Query,
+                     Request, UploadFile, status)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
 
+from db_config.connexion import session_scope
+from domain.batch_app import MAX_BATCH_SIZE, OPERATIONS, BatchApp
 from domain.client_app import ClientApp
 from domain.contract_app import ContractApp
 from domain.event_app import EventApp
+from domain.export_app import ExportApp, export_columns
+from domain.hashing import HashingOverloadedError
+from domain.import_app import DEFAULT_BATCH_SIZE, ImportApp
+from domain.report_app import ReportApp
+from domain.search_app import SearchApp
 from domain.user_app import UserApp
-
-from .serializers import Client, Contract, Event, User, UserCreate
+from models.models import PermissionTypeEnum, ResourceTypeEnum
+from repositories.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+from . import metrics
+from .dependencies import (detail_etag, get_batch_domain, get_client_domain,
+                           get_client_or_404, get_contract_domain,
+                           get_contract_or_404, get_current_user,
+                           get_event_domain, get_event_or_404,
+                           get_import_domain, get_report_domain,
+                           get_search_domain, get_user_domain,
+                           get_user_or_404, list_etag, or_404,
+                           page_params, require_permission, secret)
+from .serializers import (BatchReport, BatchRequest, Client, Contract, Event,
+                          ImportReport, Page, Report, SearchResult, User,
+                          UserCreate)
 
 app = FastAPI(
     title='TartalaCRM',
@@ -38,65 +60,27 @@ app = FastAPI(
     ]
 )
 
-event_domain = EventApp()
-contract_domain = ContractApp()
-client_domain = ClientApp()
-user_domain = UserApp()
-secret = os.environ.get("JWT_SECRET")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="get_token")
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Token invalide ou expiré",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+api_mode = os.environ.get("API_MODE", "sync")
+read_router = APIRouter()
+app.add_middleware(metrics.RequestMetricsMiddleware)
 
-    try:
-        payload = jwt.decode(token, key=secret, algorithms=["HS256"])
-        user_id: int = payload.get("id")
-        username: str = payload.get("username")
-        if user_id is None or username is None:
-            raise credentials_exception
-    except jwt.InvalidTokenError:
-        raise credentials_exception
-    else:
-        return user_domain.get_by_id_and_username(user_id, username)
-
-def get_event_or_404(id):
-    event = event_domain.get_by_id(id)
-    if not event:
-        raise HTTPException(
-            status_code=404, detail="Il n'existe aucun événement avec cet id.")
-    return event
-
-
-def get_client_or_404(id):
-    client = client_domain.get_by_id(id)
-    if not client:
-        raise HTTPException(
-            status_code=404, detail="Il n'existe aucun client avec cet id.")
-    return client
 
-
-def get_contract_or_404(id):
-    contract = contract_domain.get_by_id(id)
-    if not contract:
-        raise HTTPException(
-            status_code=404, detail="Il n'existe aucun contrat avec cet id.")
-    return contract
+@app.exception_handler(HashingOverloadedError)
+def hashing_overloaded(request: Request, exc: HashingOverloadedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service surchargé, merci de réessayer dans quelques instants."},
+        headers={"Retry-After": "1"},
+    )
 
 
-def get_user_or_404(id):
-    user = user_domain.get_by_id(id)
-    if not user:
-        raise HTTPException(
-            status_code=404, detail="Il n'existe aucun utilisateur avec cet id.")
-    return user
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/get_token")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+def login(form_data: OAuth2PasswordRequestForm = Depends(), user_domain: UserApp = Depends(get_user_domain)):
     user = user_domain.authentification(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -111,100 +95,241 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@app.get("/events/", response_model=List[Event], tags=['events',])
-def list_events(current_user: User = Depends(get_current_user)):
-    return event_domain.list_all_events()
+@read_router.get("/events/", response_model=Page[Event], tags=['events',], dependencies=[Depends(list_etag(ResourceTypeEnum.EVENT))])
+def list_events(page: dict = Depends(page_params), event_domain: EventApp = Depends(get_event_domain), current_user: User = Depends(get_current_user)):
+    return event_domain.list_all_events(**page, profile="api-detail")._asdict()
 
 
-@app.get("/clients/", response_model=List[Client], tags=['clients',])
-def list_clients(current_user: User = Depends(get_current_user)):
-    return client_domain.list_all_clients()
+@read_router.get("/clients/", response_model=Page[Client], tags=['clients',], dependencies=[Depends(list_etag(ResourceTypeEnum.CLIENT))])
+def list_clients(page: dict = Depends(page_params), client_domain: ClientApp = Depends(get_client_domain), current_user: User = Depends(get_current_user)):
+    return client_domain.list_all_clients(**page, profile="api-detail")._asdict()
 
 
-@app.get("/contracts/", response_model=List[Contract], tags=['contrats',])
-def list_contracts(current_user: User = Depends(get_current_user)):
-    return contract_domain.list_all_contracts()
+@read_router.get("/contracts/", response_model=Page[Contract], tags=['contrats',], dependencies=[Depends(list_etag(ResourceTypeEnum.CONTRACT))])
+def list_contracts(page: dict = Depends(page_params), contract_domain: ContractApp = Depends(get_contract_domain), current_user: User = Depends(get_current_user)):
+    return contract_domain.list_all_contracts(**page, profile="api-detail")._asdict()
 
 
-@app.get("/event/{id}", response_model=Event, tags=['events',])
-def get_event(id: int, current_user: User = Depends(get_current_user)):
-    return get_event_or_404(id)
+@read_router.get("/event/{id}", response_model=Event, tags=['events',], dependencies=[Depends(detail_etag(ResourceTypeEnum.EVENT))])
+def get_event(id: int, event_domain: EventApp = Depends(get_event_domain), current_user: User = Depends(get_current_user)):
+    return get_event_or_404(id, event_domain)
 
 
-@app.get("/client/{id}", response_model=Client, tags=['clients',])
-def get_client(id: int, current_user: User = Depends(get_current_user)):
-    return get_client_or_404(id)
+@read_router.get("/client/{id}", response_model=Client, tags=['clients',], dependencies=[Depends(detail_etag(ResourceTypeEnum.CLIENT))])
+def get_client(id: int, client_domain: ClientApp = Depends(get_client_domain), current_user: User = Depends(get_current_user)):
+    return get_client_or_404(id, client_domain)
 
 
-@app.get("/contract/{id}", response_model=Contract, tags=['contrats',])
-def get_contract(id: int, current_user: User = Depends(get_current_user)):
-    return get_contract_or_404(id)
+@read_router.get("/contract/{id}", response_model=Contract, tags=['contrats',], dependencies=[Depends(detail_etag(ResourceTypeEnum.CONTRACT))])
+def get_contract(id: int, contract_domain: ContractApp = Depends(get_contract_domain), current_user: User = Depends(get_current_user)):
+    return get_contract_or_404(id, contract_domain)
 
 
-@app.get("/user/{id}", response_model=User, tags=['users',])
-def get_user(id: int, current_user: User = Depends(get_current_user)):
-    return get_user_or_404(id)
+@read_router.get("/user/{id}", response_model=User, tags=['users',], dependencies=[Depends(detail_etag(ResourceTypeEnum.USER))])
+def get_user(id: int, user_domain: UserApp = Depends(get_user_domain), current_user: User = Depends(get_current_user)):
+    return get_user_or_404(id, user_domain)
 
 
 @app.post("/event", response_model=Event, tags=['events',])
-def create_event(event: Event, current_user: User = Depends(get_current_user)):
+def create_event(event: Event, event_domain: EventApp = Depends(get_event_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.EVENT, PermissionTypeEnum.CREATE))):
     return event_domain.create(**event)
 
 
 @app.post("/client", response_model=Client, tags=['clients',])
-def create_client(client: Client, current_user: User = Depends(get_current_user)):
+def create_client(client: Client, client_domain: ClientApp = Depends(get_client_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CLIENT, PermissionTypeEnum.CREATE))):
     return client_domain.create(**client)
 
 
 @app.post("/contract", response_model=Contract, tags=['contrats',])
-def create_contract(contract: Contract, current_user: User = Depends(get_current_user)):
+def create_contract(contract: Contract, contract_domain: ContractApp = Depends(get_contract_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CONTRACT, PermissionTypeEnum.CREATE))):
     return contract_domain.create(**contract)
 
 
 @app.post("/user", response_model=User, tags=['users',])
-def create_user(user: UserCreate, current_user: User = Depends(get_current_user)):
+def create_user(user: UserCreate, user_domain: UserApp = Depends(get_user_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.USER, PermissionTypeEnum.CREATE))):
     return user_domain.create(**user)
 
 
 @app.put("/event/{id}", response_model=Event, tags=['events',])
-def update_event(id: int, event: Event, current_user: User = Depends(get_current_user)):
+def update_event(id: int, event: Event, event_domain: EventApp = Depends(get_event_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.EVENT, PermissionTypeEnum.UPDATE))):
     return event_domain.update(id=id, **event)
 
 
 @app.put("/client/{id}", response_model=Client, tags=['clients',])
-def update_client(id: int, client: Client, current_user: User = Depends(get_current_user)):
+def update_client(id: int, client: Client, client_domain: ClientApp = Depends(get_client_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CLIENT, PermissionTypeEnum.UPDATE))):
     return client_domain.update(id=id, **client)
 
 
 @app.put("/contract/{id}", response_model=Contract, tags=['contrats',])
-def update_contract(id: int, contract: Contract, current_user: User = Depends(get_current_user)):
+def update_contract(id: int, contract: Contract, contract_domain: ContractApp = Depends(get_contract_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CONTRACT, PermissionTypeEnum.UPDATE))):
     return contract_domain.update(id=id, **contract)
 
 
 @app.put("/user/{id}", response_model=User, tags=['users',])
-def update_user(id: int, user: User, current_user: User = Depends(get_current_user)):
+def update_user(id: int, user: User, user_domain: UserApp = Depends(get_user_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.USER, PermissionTypeEnum.UPDATE))):
     return user_domain.update(id=id ** user)
 
 
 @app.delete("/event/{id}", status_code=status.HTTP_204_NO_CONTENT, tags=['users',])
-def delete_event(id: int, current_user: User = Depends(get_current_user)):
-    get_event_or_404(id)
-    event_domain.delete(id)
+def delete_event(id: int, event_domain: EventApp = Depends(get_event_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.EVENT, PermissionTypeEnum.DELETE))):
+    or_404(event_domain.delete(id), "Il n'existe aucun événement avec cet id.")
 
 
 @app.delete("/client/{id}", status_code=status.HTTP_204_NO_CONTENT, tags=['clients',])
-def delete_client(id: int, current_user: User = Depends(get_current_user)):
-    get_client_or_404(id)
-    client_domain.delete(id)
+def delete_client(id: int, client_domain: ClientApp = Depends(get_client_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CLIENT, PermissionTypeEnum.DELETE))):
+    or_404(client_domain.delete(id), "Il n'existe aucun client avec cet id.")
 
 
 @app.delete("/contract/{id}", status_code=status.HTTP_204_NO_CONTENT, tags=['contrats',])
-def delete_contract(id: int, current_user: User = Depends(get_current_user)):
-    get_contract_or_404(id)
-    contract_domain.delete(id)
+def delete_contract(id: int, contract_domain: ContractApp = Depends(get_contract_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.CONTRACT, PermissionTypeEnum.DELETE))):
+    or_404(contract_domain.delete(id), "Il n'existe aucun contrat avec cet id.")
 
 
 @app.delete("/user/{id}", status_code=status.HTTP_204_NO_CONTENT, tags=['users',])
-def delete_user(id: int, current_user: User = Depends(get_current_user)):
-    get_user_or_404(id)
-    user_domain.delete(id)
+def delete_user(id: int, user_domain: UserApp = Depends(get_user_domain), current_user: User = Depends(require_permission(ResourceTypeEnum.USER, PermissionTypeEnum.DELETE))):
+    or_404(user_domain.delete(id), "Il n'existe aucun utilisateur avec cet id.")
+
+
+@app.post("/{resource}/batch", response_model=BatchReport, tags=['batch',],
+          responses={403: {"model": BatchReport, "description": "Lot refusé : opération non autorisée"},
+                     409: {"model": BatchReport, "description": "Lot refusé : rien n'a été écrit"}})
+def batch_items(
+    resource: str,
+    batch: BatchRequest,
+    batch_domain: BatchApp = Depends(get_batch_domain),
+    user_domain: UserApp = Depends(get_user_domain),
+    current_user: User = Depends(get_current_user),
+):
+    if resource not in BatchApp.RESOURCES:
+        raise HTTPException(status_code=404, detail="Ressource inconnue.")
+    if len(batch.operations) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Un lot contient au plus {MAX_BATCH_SIZE} opérations.",
+        )
+    allowed = [op for op in OPERATIONS if user_domain.has_permission(current_user, resource[:-1], op)]
+    report = batch_domain.apply(
+        resource, [operation.model_dump() for operation in batch.operations],
+        current_user.id, allowed, batch.atomic)
+    body = {**report._asdict(), "results": [item._asdict() for item in report.results]}
+    if not report.committed and report.error_count:
+        # A refused batch is an authorization failure as soon as one of its
+        # operations is not allowed, a data conflict otherwise.
+        if any(operation.op not in allowed for operation in batch.operations):
+            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content=body)
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT, content=body)
+    return body
+
+
+@app.post("/import/{resource}", response_model=ImportReport, tags=['import',])
+def import_items(
+    resource: str,
+    file: UploadFile,
+    format: str = Query(None, pattern="^(csv|jsonl)$", description="Déduit du nom du fichier par défaut"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+    start_line: int = Query(1, ge=1),
+    import_domain: ImportApp = Depends(get_import_domain),
+    user_domain: UserApp = Depends(get_user_domain),
+    current_user: User = Depends(get_current_user),
+):
+    if resource not in ImportApp.RESOURCES:
+        raise HTTPException(status_code=404, detail="Ressource inconnue.")
+    if not user_domain.has_permission(current_user, resource[:-1], "create"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Vous n'êtes pas autorisé à effectuer cette action sur cette ressource.",
+        )
+
+    # The upload is spooled to disk by Starlette and read line by line here.
+    text = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    report = import_domain.import_file(
+        resource, text, format or ImportApp.detect_format(file.filename or ""),
+        current_user.id, batch_size, start_line)
+    return {
+        **report._asdict(),
+        "errors": [{"line": line, "message": message} for line, message in report.errors],
+    }
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@app.get("/export/{resource}", tags=['export',])
+def export_items(
+    resource: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: str = Query(None, description="Colonnes séparées par des virgules (toutes par défaut)"),
+    user_domain: UserApp = Depends(get_user_domain),
+    current_user: User = Depends(get_current_user),
+):
+    if resource not in ExportApp.RESOURCES:
+        raise HTTPException(status_code=404, detail="Ressource inconnue.")
+    if not user_domain.has_permission(current_user, resource[:-1], "read"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Vous n'êtes pas autorisé à effectuer cette action sur cette ressource.",
+        )
+    try:
+        selected = export_columns(resource, columns.split(",") if columns else None)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    # The body outlives the request dependencies: the generator owns its own
+    # session, closed once the last chunk is sent or the client disconnects.
+    def stream():
+        with session_scope() as session:
+            yield from ExportApp(session).export(resource, format, selected)
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{format}"'},
+    )
+
+
+@app.get("/search", response_model=Page[SearchResult], tags=['search',])
+def search(
+    q: str = Query(..., min_length=1),
+    resource: str = Query(None, pattern="^(clients|events)$", description="Toutes les ressources lisibles par défaut"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, description="next_cursor de la page précédente"),
+    search_domain: SearchApp = Depends(get_search_domain),
+    user_domain: UserApp = Depends(get_user_domain),
+    current_user: User = Depends(get_current_user),
+):
+    readable = [name for name in ([resource] if resource else SearchApp.RESOURCES)
+                if user_domain.has_permission(current_user, name[:-1], "read")]
+    if not readable:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Vous n'êtes pas autorisé à effectuer cette action sur cette ressource.",
+        )
+    try:
+        return search_domain.search(q, readable, limit, offset)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+
+@app.get("/reports/{name}", response_model=Report, tags=['reports',])
+def get_report(
+    name: str,
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Nombre de lignes (toutes par défaut)"),
+    live: bool = Query(False, description="Calcule depuis les contrats sans passer par la table de synthèse"),
+    report_domain: ReportApp = Depends(get_report_domain),
+    current_user: User = Depends(require_permission(ResourceTypeEnum.CONTRACT, PermissionTypeEnum.READ)),
+):
+    if name not in ReportApp.REPORTS:
+        raise HTTPException(status_code=404, detail="Rapport inconnu.")
+    lines, source = report_domain.report(name, limit, live)
+    return {"name": name, "source": source, "lines": lines}
+
+
+if api_mode == "async":
+    from db_config.async_connexion import async_engine
+
+    from .async_routes import async_read_router
+    app.include_router(async_read_router)
+    # aiosqlite keeps one worker thread per pooled connection alive.
+    app.add_event_handler("shutdown", async_engine.dispose)
+else:
+    app.include_router(read_router)
@@ -0,0 +1,100 @@
+"""Compare the sync (threadpool) and async (event loop) read API paths.
+
+Each mode runs in its own process, since API_MODE is read when api.server is
+imported. Requests go through httpx's ASGI transport, so the numbers measure
+the application and database layers without any network in between.
+
+    python -m benchmarks.api_modes --requests 2000 --concurrency 64 --path /events/
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import latency_summary, print_latency_table
+
+
+async def run_mode(args):
+    import httpx
+
+    from api.server import app
+
+    latencies = []
+    statuses = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post(
+                "/get_token", data={"username": args.username, "password": args.password})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def hit():
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(args.path, headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            for _ in range(args.warmup):
+                await hit()
+            latencies.clear()
+            statuses.clear()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(hit() for _ in range(args.requests)))
+            elapsed = time.perf_counter() - start
+
+    return {
+        "mode": os.environ.get("API_MODE", "sync"),
+        "path": args.path,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        **latency_summary(latencies, elapsed, args.requests),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/events/")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--username", default="gestion")
+    parser.add_argument("--password", default="gestion")
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--json", dest="json_path", help="Écrit les résultats dans ce fichier.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        child_args = [
+            "--path", args.path, "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency), "--warmup", str(args.warmup),
+            "--username", args.username, "--password", args.password,
+        ]
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.api_modes", "--child", *child_args],
+            env={**os.environ, "API_MODE": mode},
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print_latency_table(results, "mode")
+
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import statistics
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def latency_summary(latencies, elapsed, count):
+    return {
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def print_latency_table(results, label):
+    print(f"{label:<10} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuts")
+    for r in results:
+        print(f"{r[label]!s:<10} {r['rps']:>9} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['max_ms']:>8}  {r['statuses']}")
+
+
+class StatementCounter:
+    # Counts SQL statements sent to the database through the given engines.
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in set(engines):
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+    def reset(self):
+        count, self.count = self.count, 0
+        return count
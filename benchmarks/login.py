@@ -0,0 +1,93 @@
+"""Measure /get_token throughput with argon2 inline or in the process pool.
+
+Each configuration runs in its own process with its own HASH_WORKERS value
+(0 = inline in the API threadpool). Requests rejected by the bounded hashing
+queue show up as 503 in the status counts.
+
+    python -m benchmarks.login --requests 200 --concurrency 32 --workers 0,4
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import latency_summary, print_latency_table
+
+
+async def run_logins(args):
+    import httpx
+
+    from api.server import app
+
+    latencies = []
+    statuses = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        credentials = {"username": args.username, "password": args.password}
+
+        async def login():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/get_token", data=credentials)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        await login()
+        latencies.clear()
+        statuses.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "hash_workers": os.environ.get("HASH_WORKERS"),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        **latency_summary(latencies, elapsed, args.requests),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--username", default="gestion")
+    parser.add_argument("--password", default="gestion")
+    parser.add_argument("--workers", default=f"0,{os.cpu_count() or 1}",
+                        help="Valeurs de HASH_WORKERS à comparer, séparées par des virgules.")
+    parser.add_argument("--json", dest="json_path", help="Écrit les résultats dans ce fichier.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_logins(args))))
+        return
+
+    results = []
+    for workers in args.workers.split(","):
+        child_args = [
+            "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+            "--username", args.username, "--password", args.password,
+        ]
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.login", "--child", *child_args],
+            env={**os.environ, "HASH_WORKERS": workers},
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print_latency_table(results, "hash_workers")
+
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Check the CLI startup budget with `python -X importtime`.
+
+Importing tartalacrm must stay under --budget milliseconds (cumulative import
+time, measured in a fresh interpreter, best of --runs) and must not pull in
+any of the heavy modules that commands import lazily. Exits with status 1 on
+failure, so it can gate CI:
+
+    python -m benchmarks.startup --budget 150
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ["sqlalchemy", "rich", "jwt", "sentry_sdk", "passlib", "models.models", "db_config.connexion",
+                "populate", "domain.user_app"]
+
+
+def import_times(module):
+    # -X importtime writes "import time: self [us] | cumulative | imported package"
+    # to stderr, one line per module, children indented and listed before
+    # their parent. Only the subtree of `module` is kept, not what the
+    # interpreter imports at startup.
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, check=True, capture_output=True, text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            if name.strip() == module:
+                times[module] = int(cumulative)
+                return times
+            times = {}
+            continue
+        times[name.strip()] = int(cumulative)
+    raise RuntimeError(f"{module} absent de la sortie -X importtime")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=150, help="Budget d'import en millisecondes.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="tartalacrm")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[args.module])
+    elapsed = best[args.module] / 1000
+    heavy = [name for name in LAZY_MODULES if name in best]
+
+    print(f"import {args.module} : {elapsed:.1f} ms (budget {args.budget:.0f} ms)")
+    for name, cumulative in sorted(best.items(), key=lambda item: -item[1])[1:11]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    if heavy:
+        print(f"Modules importés au démarrage alors qu'ils devraient l'être à la demande : {', '.join(heavy)}")
+
+    sys.exit(1 if elapsed > args.budget or heavy else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Time repositories, table rendering, API endpoints, login and CLI commands.
+
+Each scale gets its own database, built once with `populate --scale` in
+benchmarks/.data/scale-N/ and reused by later runs. Every case reports the
+median, minimum and p95 wall time over --repeat runs plus the number of SQL
+statements one run sends. Two result files can then be compared:
+
+    python -m benchmarks.suite --scales 1000,10000 --json before.json
+    python -m benchmarks.suite --scales 1000,10000 --json after.json
+    python -m benchmarks.suite --compare before.json after.json
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+PAGE_SIZE = 50
+USERNAME = PASSWORD = "commercial"
+
+
+def measure(fn, repeat, counter):
+    fn()
+    counter.reset()
+    fn()
+    statements = counter.reset()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    counter.reset()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "statements": statements,
+    }
+
+
+def in_process_cases(repeat):
+    import sqlalchemy as db
+    from fastapi.testclient import TestClient
+    from rich.console import Console
+    from rich.table import Table
+
+    import utils
+    from api.server import app
+    from benchmarks.common import StatementCounter
+    from db_config.connexion import engine, read_engine, session_scope
+    from domain.client_app import ClientApp
+    from domain.contract_app import ContractApp
+    from domain.event_app import EventApp
+    from domain.user_app import UserApp
+    from models.models import Contracts
+    from repositories.clients.client_repository import ClientRepository
+    from repositories.contracts.contract_repository import ContractRepository
+    from repositories.events.event_repository import EventRepository
+
+    counter = StatementCounter(engine, read_engine)
+    results = {}
+
+    def in_session(fn):
+        def run():
+            with session_scope() as session:
+                return fn(session)
+        return run
+
+    def render(add_columns):
+        def run(session):
+            table = Table()
+            add_columns(session, table)
+            Console(file=io.StringIO(), width=200).print(table)
+        return run
+
+    with session_scope() as session:
+        user = UserApp(session).get_by_username(USERNAME)
+        session.expunge(user)
+        # A fifth of the generated contracts have no event: the API must
+        # serialize their NULL reference, on a detail page and deep in a list.
+        contract_without_event = session.execute(
+            db.select(db.func.min(Contracts.id)).where(Contracts.event_id.is_(None))).scalar()
+    everything = utils.BasicFilters.ALL.value
+
+    cases = {
+        "repo.list_all_events": lambda s: EventRepository(s).list_all_events(PAGE_SIZE, profile="table"),
+        "repo.list_all_contracts": lambda s: ContractRepository(s).list_all_contracts(PAGE_SIZE, profile="table"),
+        "repo.list_all_clients": lambda s: ClientRepository(s).list_all_clients(PAGE_SIZE, profile="table"),
+        "table.events": render(lambda s, t: EventApp(s).add_event_column_to_table(user, everything, t, PAGE_SIZE)),
+        "table.contracts": render(
+            lambda s, t: ContractApp(s).add_contract_column_to_table(user, everything, t, PAGE_SIZE)),
+        "table.clients": render(lambda s, t: ClientApp(s).add_client_column_to_table(t, PAGE_SIZE)),
+    }
+    for name, fn in cases.items():
+        results[name] = measure(in_session(fn), repeat, counter)
+
+    with TestClient(app) as client:
+        credentials = {"username": USERNAME, "password": PASSWORD}
+
+        def login():
+            response = client.post("/get_token", data=credentials)
+            response.raise_for_status()
+            return response.json()["access_token"]
+
+        headers = {"Authorization": f"Bearer {login()}"}
+        results["api.login"] = measure(login, repeat, counter)
+        for path in ("/events/", "/contracts/", "/clients/"):
+            def get(path=path):
+                client.get(path, params={"limit": PAGE_SIZE}, headers=headers).raise_for_status()
+            results[f"api.get {path}"] = measure(get, repeat, counter)
+
+            def get_next_page(path=path):
+                # The ETag of the first page must not validate the second one.
+                first = client.get(path, params={"limit": PAGE_SIZE}, headers=headers)
+                response = client.get(
+                    path, params={"limit": PAGE_SIZE, "after": first.json()["next_cursor"]},
+                    headers={**headers, "If-None-Match": first.headers["ETag"]})
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} : l'ETag de la première page valide la page suivante")
+            results[f"api.etag {path} page 2"] = measure(get_next_page, repeat, counter)
+        if contract_without_event is not None:
+            null_reference_cases = {
+                "api.null /contract/{id}": (f"/contract/{contract_without_event}", {}),
+                "api.null /contracts/": (
+                    "/contracts/", {"limit": PAGE_SIZE, "after": contract_without_event - 1}),
+            }
+            for name, (path, params) in null_reference_cases.items():
+                def get(path=path, params=params):
+                    client.get(path, params=params, headers=headers).raise_for_status()
+                results[name] = measure(get, repeat, counter)
+
+    return results
+
+
+def cli_cases(workdir, repeat):
+    commands = {
+        "cli.help": (["--help"], ""),
+        "cli.list_items clients": (["list_items", "clients", "--page-size", str(PAGE_SIZE)], ""),
+        "cli.list_items events": (["list_items", "events", "--page-size", str(PAGE_SIZE)], "\n"),
+    }
+    results = {}
+    for name, (args, stdin) in commands.items():
+        def run():
+            subprocess.run([sys.executable, os.path.join(ROOT, "tartalacrm.py"), *args],
+                           cwd=workdir, env=child_env(workdir), input=stdin, text=True, check=True,
+                           capture_output=True)
+        timings = []
+        run()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "min_ms": round(min(timings) * 1000, 3),
+            "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        }
+    return results
+
+
+def child_env(workdir):
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'tartala-crm')}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "benchmark"),
+    }
+
+
+def build_database(workdir, scale, seed):
+    if os.path.exists(os.path.join(workdir, "tartala-crm")):
+        return
+    os.makedirs(workdir, exist_ok=True)
+    env = child_env(workdir)
+    for command in ("migrate", "populate"):
+        subprocess.run([sys.executable, os.path.join(ROOT, "tartalacrm.py"), command],
+                       cwd=workdir, env=env, check=True, capture_output=True)
+    subprocess.run([sys.executable, os.path.join(ROOT, "tartalacrm.py"), "populate",
+                    "--scale", str(scale), "--seed", str(seed)],
+                   cwd=workdir, env=env, check=True, capture_output=True)
+
+
+def run_scale(scale, args):
+    workdir = os.path.join(DATA_DIR, f"scale-{scale}")
+    build_database(workdir, scale, args.seed)
+
+    # Commands run from the workdir, which also holds the CLI token file.
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--child", "--repeat", str(args.repeat)],
+        cwd=workdir, env=child_env(workdir), check=True, capture_output=True, text=True,
+    ).stdout
+    results = json.loads(output.strip().splitlines()[-1])
+
+    import jwt
+    with open(os.path.join(workdir, ".tartalacrm_config"), "w") as file:
+        file.write(jwt.encode({"id": results.pop("_user_id"), "username": USERNAME},
+                              key=child_env(workdir)["JWT_SECRET"]))
+    results.update(cli_cases(workdir, max(args.repeat // 4, 3)))
+    return results
+
+
+def print_results(results):
+    print(f"{'scale':>8}  {'cas':<28} {'médiane ms':>11} {'min ms':>9} {'p95 ms':>9} {'requêtes':>9}")
+    for scale, cases in results["scales"].items():
+        for name, case in cases.items():
+            print(f"{scale:>8}  {name:<28} {case['median_ms']:>11} {case['min_ms']:>9} "
+                  f"{case['p95_ms']:>9} {case.get('statements', '-'):>9}")
+
+
+def compare(before_path, after_path, threshold):
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+
+    regressions = 0
+    print(f"{'scale':>8}  {'cas':<28} {'avant ms':>9} {'après ms':>9} {'ratio':>7} {'requêtes':>10}")
+    for scale, cases in after["scales"].items():
+        for name, case in cases.items():
+            old = before["scales"].get(scale, {}).get(name)
+            if old is None:
+                continue
+            ratio = case["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            statements = f"{old.get('statements', '-')}→{case.get('statements', '-')}"
+            flag = ""
+            if ratio > 1 + threshold or case.get("statements", 0) > old.get("statements", 0):
+                flag = "  ⚠"
+                regressions += 1
+            print(f"{scale:>8}  {name:<28} {old['median_ms']:>9} {case['median_ms']:>9} "
+                  f"{ratio:>7.2f} {statements:>10}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000",
+                        help="Tailles de base (populate --scale) séparées par des virgules.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", dest="json_path", help="Écrit les résultats dans ce fichier.")
+    parser.add_argument("--compare", nargs=2, metavar=("AVANT", "APRES"),
+                        help="Compare deux fichiers de résultats au lieu de mesurer.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Ralentissement relatif signalé comme régression avec --compare.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        from db_config.connexion import session_scope
+        from domain.user_app import UserApp
+
+        results = in_process_cases(args.repeat)
+        with session_scope() as session:
+            results["_user_id"] = UserApp(session).get_by_username(USERNAME).id
+        print(json.dumps(results))
+        return
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                            capture_output=True, text=True).stdout.strip()
+    results = {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "scales": {scale: run_scale(int(scale), args) for scale in args.scales.split(",")},
+    }
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
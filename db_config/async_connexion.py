@@ -0,0 +1,28 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from .connexion import instrument
+from .settings import apply_sqlite_pragmas, async_database_url, engine_options
+
+async_url_object = async_database_url()
+
+async_engine = create_async_engine(async_url_object, **engine_options(async_url_object))
+apply_sqlite_pragmas(async_engine.sync_engine)
+instrument(async_engine.sync_engine)
+
+# Objects are serialized after the handler returns, outside of any awaitable
+# context: they must not expire (and lazy load) on commit.
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@asynccontextmanager
+async def async_session_scope():
+    session = AsyncSession()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
@@ -1,15 +1,94 @@
-from sqlalchemy import URL, create_engine
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import CompoundSelect, Select, create_engine, event
+from sqlalchemy.orm import Session as OrmSession
 from sqlalchemy.orm import sessionmaker
 
-from models.models import *
+from .settings import (DATABASE_URL, apply_sqlite_pragmas, engine_options,
+                       read_database_url)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Statements run (and time spent in them) by the current request or command.
+# The stats object is shared by the threads and greenlets copying this context.
+query_stats = ContextVar("query_stats", default=None)
+
+
+def track_queries():
+    stats = QueryStats()
+    query_stats.set(stats)
+    return stats
+
+
+def _record_query(conn):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+
+
+def instrument(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        _record_query(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def stop_failed_timer(exception_context):
+        # A failed statement gets no after_cursor_execute.
+        if exception_context.connection is not None and exception_context.execution_context is not None:
+            _record_query(exception_context.connection)
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+apply_sqlite_pragmas(engine)
+instrument(engine)
+
+read_url = read_database_url()
+if read_url is None:
+    read_engine = engine
+else:
+    read_engine = create_engine(read_url, **engine_options(read_url))
+    apply_sqlite_pragmas(read_engine, read_only=True)
+    instrument(read_engine)
+
 
-from .base import Base
+class RoutingSession(OrmSession):
+    # SELECTs (queries, lazy loads, refreshes) go to the read engine; flushes,
+    # INSERT/UPDATE/DELETE, raw SQL and session.connection() go to the
+    # primary. A session that has touched the primary stays on it, so a
+    # request or a command always reads its own writes.
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get("primary") and isinstance(clause, (Select, CompoundSelect)):
+            return read_engine
+        self.info["primary"] = True
+        return engine
 
-url_object = URL.create("sqlite", database="tartala-crm")
 
-engine = create_engine(url_object, echo=False)
+Session = sessionmaker(class_=RoutingSession)
 
-Base.metadata.create_all(engine)
 
-Session = sessionmaker(bind=engine)
-session = Session()
+@contextmanager
+def session_scope():
+    session = Session()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,105 @@
+import sqlalchemy as db
+
+from models.models import Contracts, ContractStatusEnum, Events, Users
+from repositories.pagination import DEFAULT_PAGE_SIZE, keyset_query
+
+from .base import Base
+from .report_summary import create_report_summary
+from .search_index import create_search_indexes
+
+# Queries behind the login and the list filters of the CLI and the API,
+# used to report their plans before and after the migration.
+HOT_QUERIES = {
+    "Connexion (username)": db.select(Users).where(Users.username == "gestion"),
+    "Contrats - Mes fiches": keyset_query(
+        db.select(Contracts).where(Contracts.user_id == 1), Contracts.id, DEFAULT_PAGE_SIZE),
+    "Contrats non signés": keyset_query(
+        db.select(Contracts).where(Contracts.status == ContractStatusEnum.NOT_SIGNED),
+        Contracts.id, DEFAULT_PAGE_SIZE),
+    "Contrats non soldés": keyset_query(
+        db.select(Contracts).where(Contracts.due_amount > 0), Contracts.id, DEFAULT_PAGE_SIZE),
+    "Contrats d'un client": db.select(Contracts).where(Contracts.client_id == 1),
+    "Evénements - Mes fiches": keyset_query(
+        db.select(Events).where(Events.user_id == 1), Events.id, DEFAULT_PAGE_SIZE),
+    "Evénements sans support": keyset_query(
+        db.select(Events).where(Events.user_id.is_(None)), Events.id, DEFAULT_PAGE_SIZE),
+    "Evénements d'un client": db.select(Events).where(Events.client_id == 1),
+    "Evénements à venir": db.select(Events).where(Events.start >= db.func.current_date()),
+}
+
+
+# Indexes dropped from the models that migrate removes from existing databases.
+OBSOLETE_INDEXES = {
+    "contracts": ["ix_contracts_not_signed_partial"],
+}
+
+
+def explain(conn, query):
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def query_plans(conn):
+    return {name: explain(conn, query) for name, query in HOT_QUERIES.items()}
+
+
+def missing_indexes(conn):
+    inspector = db.inspect(conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(
+            index for index in table.indexes
+            if index.name not in existing and conn.dialect.name in index.info.get("dialects", (conn.dialect.name,))
+        )
+    return missing
+
+
+def obsolete_indexes(conn):
+    inspector = db.inspect(conn)
+    obsolete = []
+    for table, names in OBSOLETE_INDEXES.items():
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name in names:
+            if name in existing:
+                # Bound to a throwaway table: the models no longer declare it.
+                index = db.Index(name)
+                db.Table(table, db.MetaData(), index)
+                obsolete.append(index)
+    return obsolete
+
+
+def create_schema(engine):
+    # Schema creation is explicit (`migrate` command) rather than done when
+    # the engine module is imported.
+    with engine.begin() as conn:
+        inspector = db.inspect(conn)
+        tables = [table for table in Base.metadata.sorted_tables if not inspector.has_table(table.name)]
+        Base.metadata.create_all(conn, tables=tables)
+        search_indexes = create_search_indexes(conn)
+        summaries = create_report_summary(conn)
+    return [table.name for table in tables] + search_indexes + summaries
+
+
+def migrate(engine):
+    with engine.begin() as conn:
+        before = query_plans(conn)
+        dropped = []
+        for index in obsolete_indexes(conn):
+            index.drop(conn)
+            dropped.append(index.name)
+        created = []
+        for index in missing_indexes(conn):
+            index.create(conn)
+            created.append(index.name)
+        if created and conn.dialect.name in ("sqlite", "postgresql"):
+            # Fresh statistics let the planner choose the partial index.
+            conn.exec_driver_sql("ANALYZE")
+        after = query_plans(conn)
+    return created, dropped, before, after
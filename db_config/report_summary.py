@@ -0,0 +1,100 @@
+import sqlalchemy as db
+
+from .settings import REPORT_SUMMARY
+
+# Contract totals per (commercial, client, month of creation), kept current
+# by triggers on every write to `contracts` and `resources` so that the
+# reports sum a few thousand rows instead of every contract. Missing keys
+# are stored as 0 / '' because NULLs never conflict in an upsert.
+SUMMARY_TABLE = "contract_totals"
+
+contract_totals = db.table(
+    SUMMARY_TABLE,
+    db.column("user_id"),
+    db.column("client_id"),
+    db.column("month"),
+    db.column("contract_count"),
+    db.column("total_amount"),
+    db.column("signed_amount"),
+    db.column("due_amount"),
+)
+
+_KEYS = "user_id, client_id, month"
+_MEASURES = ["contract_count", "total_amount", "signed_amount", "due_amount"]
+
+
+def _values(user_id, created, contract):
+    return [
+        f"coalesce({user_id}, 0)",
+        f"coalesce({contract}.client_id, 0)",
+        f"coalesce(strftime('%Y-%m', {created}), '')",
+        "1",
+        f"coalesce({contract}.amount, 0)",
+        f"CASE WHEN {contract}.status = 'SIGNED' THEN coalesce({contract}.amount, 0) ELSE 0 END",
+        f"coalesce({contract}.due_amount, 0)",
+    ]
+
+
+def _delta(sign, values, source):
+    signed = values[:3] + [f"{sign}({value})" for value in values[3:]]
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in _MEASURES)
+    return (
+        f"INSERT INTO {SUMMARY_TABLE} ({_KEYS}, {', '.join(_MEASURES)}) "
+        f"SELECT {', '.join(signed)} FROM {source} "
+        f"ON CONFLICT ({_KEYS}) DO UPDATE SET {updates};"
+    )
+
+
+def _contract_delta(sign, contract):
+    return _delta(sign, _values("r.user_id", "r.creation_date", contract),
+                  f"resources AS r WHERE r.id = {contract}.id")
+
+
+def _resource_delta(sign, resource):
+    return _delta(sign, _values(f"{resource}.user_id", f"{resource}.creation_date", "c"),
+                  "contracts AS c WHERE c.id = new.id")
+
+
+def rebuild_statements():
+    values = _values("r.user_id", "r.creation_date", "c")
+    sums = ", ".join(values[:3] + [f"sum({value})" for value in values[3:]])
+    return [
+        f"DELETE FROM {SUMMARY_TABLE}",
+        f"INSERT INTO {SUMMARY_TABLE} ({_KEYS}, {', '.join(_MEASURES)}) "
+        f"SELECT {sums} FROM contracts AS c JOIN resources AS r ON r.id = c.id GROUP BY 1, 2, 3",
+    ]
+
+
+def _ddl():
+    # Contracts are written after their `resources` row and deleted before
+    # it, so the contract triggers always find the owner and the date.
+    return [
+        f"CREATE TABLE {SUMMARY_TABLE} ("
+        "user_id INTEGER NOT NULL, client_id INTEGER NOT NULL, month TEXT NOT NULL, "
+        "contract_count INTEGER NOT NULL, total_amount INTEGER NOT NULL, "
+        "signed_amount INTEGER NOT NULL, due_amount INTEGER NOT NULL, "
+        f"PRIMARY KEY ({_KEYS}))",
+        f"CREATE TRIGGER {SUMMARY_TABLE}_ai AFTER INSERT ON contracts BEGIN "
+        f"{_contract_delta('+', 'new')} END",
+        f"CREATE TRIGGER {SUMMARY_TABLE}_ad AFTER DELETE ON contracts BEGIN "
+        f"{_contract_delta('-', 'old')} END",
+        f"CREATE TRIGGER {SUMMARY_TABLE}_au AFTER UPDATE OF amount, due_amount, status, client_id "
+        f"ON contracts BEGIN {_contract_delta('-', 'old')} {_contract_delta('+', 'new')} END",
+        f"CREATE TRIGGER {SUMMARY_TABLE}_ru AFTER UPDATE OF user_id, creation_date ON resources "
+        f"WHEN new.type = 'contract' BEGIN {_resource_delta('-', 'old')} {_resource_delta('+', 'new')} END",
+    ] + rebuild_statements()
+
+
+def has_report_summary(conn):
+    return conn.dialect.name == "sqlite" and db.inspect(conn).has_table(SUMMARY_TABLE)
+
+
+def create_report_summary(conn):
+    if not REPORT_SUMMARY or conn.dialect.name != "sqlite":
+        return []
+    inspector = db.inspect(conn)
+    if inspector.has_table(SUMMARY_TABLE) or not inspector.has_table("contracts"):
+        return []
+    for statement in _ddl():
+        conn.exec_driver_sql(statement)
+    return [SUMMARY_TABLE]
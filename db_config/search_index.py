@@ -0,0 +1,40 @@
+import sqlalchemy as db
+
+# External-content FTS5 tables: the text stays in `clients`/`events`, the
+# index only stores the tokens, and triggers keep it in sync with every
+# INSERT/UPDATE/DELETE, whether it comes from the ORM or a bulk insert.
+SEARCH_INDEXES = {
+    "clients_fts": ("clients", ["full_name", "email", "company_name"]),
+    "events_fts": ("events", ["location", "notes"]),
+}
+
+
+def _ddl(fts, table, columns):
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+        # Index the rows that existed before the table was created.
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(conn):
+    if conn.dialect.name != "sqlite":
+        return []
+    inspector = db.inspect(conn)
+    created = []
+    for fts, (table, columns) in SEARCH_INDEXES.items():
+        if inspector.has_table(fts) or not inspector.has_table(table):
+            continue
+        for statement in _ddl(fts, table, columns):
+            conn.exec_driver_sql(statement)
+        created.append(fts)
+    return created
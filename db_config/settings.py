@@ -0,0 +1,80 @@
+import os
+
+from sqlalchemy import event, make_url
+
+DATABASE_URL = make_url(os.environ.get("DATABASE_URL", "sqlite:///tartala-crm"))
+READ_DATABASE_URL = os.environ.get("READ_DATABASE_URL")
+READ_ROUTING = os.environ.get("DB_READ_ROUTING", "1") == "1"
+# Trigger-maintained contract totals behind the reports (SQLite only).
+REPORT_SUMMARY = os.environ.get("DB_REPORT_SUMMARY", "1") == "1"
+
+# Async drivers for the API_MODE=async read path; ASYNC_DATABASE_URL wins if set.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Applied to every new SQLite connection. WAL lets readers run alongside a
+# writer; synchronous=NORMAL is durable in WAL mode except on power loss;
+# a negative cache_size is in KiB.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -64 * 1024)),
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+}
+
+
+def is_sqlite_file(url):
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def read_database_url():
+    # Reads get their own pool: the replica when READ_DATABASE_URL is set,
+    # otherwise, for a SQLite file in WAL mode, a second pool on the same file
+    # (WAL readers never block the writer). None means "use the primary".
+    if not READ_ROUTING:
+        return None
+    if READ_DATABASE_URL:
+        return make_url(READ_DATABASE_URL)
+    if is_sqlite_file(DATABASE_URL) and SQLITE_PRAGMAS["journal_mode"].upper() == "WAL":
+        return DATABASE_URL
+    return None
+
+
+def async_database_url():
+    # The async API path only reads: it follows the read database if any.
+    if "ASYNC_DATABASE_URL" in os.environ:
+        return make_url(os.environ["ASYNC_DATABASE_URL"])
+    url = read_database_url() or DATABASE_URL
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def engine_options(url):
+    options = {
+        "echo": os.environ.get("DB_ECHO") == "1",
+        "pool_pre_ping": True,
+    }
+    if url.get_backend_name() != "sqlite" or is_sqlite_file(url):
+        options.update(
+            pool_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+            pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        )
+    if url.get_backend_name() == "sqlite" and url.get_driver_name() == "pysqlite":
+        # Sessions are opened and used from the API threadpool.
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def apply_sqlite_pragmas(engine, read_only=False):
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = {**SQLITE_PRAGMAS, "query_only": "ON"} if read_only else SQLITE_PRAGMAS
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
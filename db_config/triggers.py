@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+
+import sqlalchemy as db
+
+from .report_summary import has_report_summary, rebuild_statements
+from .search_index import SEARCH_INDEXES
+
+
+@contextmanager
+def deferred_triggers(conn):
+    # Bulk loads on SQLite: the search index and report summary triggers
+    # write once per inserted row. They are dropped for the load, then
+    # recreated and their tables rebuilt in one pass, in the caller's
+    # transaction so that a failed load rolls the drop back too. pysqlite
+    # only opens that transaction before DML, hence the empty DELETE.
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    conn.exec_driver_sql("DELETE FROM resources WHERE 0")
+    triggers = conn.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").all()
+    for name, _ in triggers:
+        conn.exec_driver_sql(f'DROP TRIGGER "{name}"')
+    yield
+    for _, sql in triggers:
+        conn.exec_driver_sql(sql)
+    inspector = db.inspect(conn)
+    for fts in SEARCH_INDEXES:
+        if inspector.has_table(fts):
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    if has_report_summary(conn):
+        for statement in rebuild_statements():
+            conn.exec_driver_sql(statement)
@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+
+from domain.permissions import invalidate_permissions
+from domain.ttl_cache import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, TTLCache
+from models.models import DepartmentEnum
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    # Detached copy of an authenticated user: safe to share between requests
+    # and threads, never lazy loads.
+    id: int
+    name: str
+    email: str
+    username: str
+    department: DepartmentEnum
+    permission_mask: int
+
+    @classmethod
+    def from_user(cls, user, permission_mask):
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            username=user.username,
+            department=user.department,
+            permission_mask=permission_mask,
+        )
+
+
+# user id -> UserSnapshot for JWT-authenticated API requests.
+user_snapshots = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+def invalidate_user(user_id=None):
+    invalidate_permissions(user_id)
+    if user_id is None:
+        user_snapshots.clear()
+    else:
+        user_snapshots.pop(user_id)
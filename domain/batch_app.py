@@ -0,0 +1,158 @@
+import enum
+import os
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from domain.import_app import (check_references, validate_client,
+                               validate_contract, validate_event)
+from domain.unit_of_work import unit_of_work
+from models.models import ResourceTypeEnum
+from repositories.clients.client_repository import ClientRepository
+from repositories.contracts.contract_repository import ContractRepository
+from repositories.events.event_repository import EventRepository
+from repositories.users.user_repository import UserRepository
+from repositories.versions.version_repository import VersionRepository
+
+MAX_BATCH_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 1000))
+OPERATIONS = ("create", "update", "delete")
+
+
+class BatchItem(NamedTuple):
+    index: int
+    op: str
+    id: Optional[int]
+    status: str
+    error: Optional[str] = None
+
+
+class BatchReport(NamedTuple):
+    committed: bool
+    created: int
+    updated: int
+    deleted: int
+    error_count: int
+    results: list
+
+
+def _record(row):
+    # Stored values in the shape the validators accept.
+    return {key: value.name if isinstance(value, enum.Enum) else value for key, value in row.items()}
+
+
+class BatchApp:
+    RESOURCES = ("clients", "events", "contracts")
+
+    def __init__(self, session):
+        self.session = session
+        client_repo = ClientRepository(session)
+        event_repo = EventRepository(session)
+        contract_repo = ContractRepository(session)
+        self.version_repo = VersionRepository(session)
+        self.writers = {
+            "clients": (ResourceTypeEnum.CLIENT, validate_client, client_repo,
+                        client_repo.bulk_create_clients, client_repo.bulk_update_clients,
+                        client_repo.bulk_delete_clients),
+            "events": (ResourceTypeEnum.EVENT, validate_event, event_repo,
+                       event_repo.bulk_create_events, event_repo.bulk_update_events,
+                       event_repo.bulk_delete_events),
+            "contracts": (ResourceTypeEnum.CONTRACT, validate_contract, contract_repo,
+                          contract_repo.bulk_create_contracts, contract_repo.bulk_update_contracts,
+                          contract_repo.bulk_delete_contracts),
+        }
+        self.references = {
+            "user_id": UserRepository(session),
+            "client_id": client_repo,
+            "event_id": event_repo,
+        }
+
+    def _validate(self, validate, repo, operations, owner_id, allowed):
+        now = datetime.now()
+        errors, rows = {}, {}
+        targets = [op["id"] for op in operations if op["op"] != "create" and op.get("id") is not None]
+        current = repo.rows_by_id(set(targets)) if targets else {}
+        seen = set()
+        for index, operation in enumerate(operations):
+            op, id, data = operation["op"], operation.get("id"), operation.get("data") or {}
+            if op not in allowed:
+                errors[index] = "Vous n'êtes pas autorisé à effectuer cette action sur cette ressource."
+                continue
+            if op != "create":
+                if id is None:
+                    errors[index] = "Identifiant manquant."
+                    continue
+                if id not in current:
+                    errors[index] = f"id {id} inexistant"
+                    continue
+                if id in seen:
+                    errors[index] = f"Plusieurs opérations sur l'id {id}."
+                    continue
+                seen.add(id)
+            if op == "delete":
+                continue
+            try:
+                if op == "create":
+                    row = validate(data)
+                    row["user_id"] = row["user_id"] or owner_id
+                    row["creation_date"] = now
+                else:
+                    row = validate({**_record(current[id]), **data})
+                    row["id"] = id
+            except ValueError as error:
+                errors[index] = str(error)
+                continue
+            row["modified_date"] = now
+            rows[index] = row
+        errors.update(check_references(self.references, list(rows.items())))
+        return errors, {index: row for index, row in rows.items() if index not in errors}
+
+    def apply(self, resource, operations, owner_id, allowed=OPERATIONS, atomic=True):
+        # Everything is validated first (a handful of IN queries for the
+        # whole batch), then written in one transaction with one bulk
+        # statement per operation kind.
+        resource_type, validate, repo, create, update, delete = self.writers[resource]
+        errors, rows = self._validate(validate, repo, operations, owner_id, allowed)
+
+        def report(committed, ids=None, failure=None):
+            results = []
+            for index, operation in enumerate(operations):
+                id = (ids or {}).get(index, operation.get("id"))
+                if index in errors:
+                    results.append(BatchItem(index, operation["op"], id, "error", errors[index]))
+                elif failure:
+                    results.append(BatchItem(index, operation["op"], id, "error", failure))
+                elif committed:
+                    results.append(BatchItem(index, operation["op"], id, "ok"))
+                else:
+                    results.append(BatchItem(index, operation["op"], id, "skipped"))
+            done = {op: 0 for op in OPERATIONS}
+            for result in results:
+                if result.status == "ok":
+                    done[result.op] += 1
+            return BatchReport(committed, done["create"], done["update"], done["delete"],
+                               sum(result.status == "error" for result in results), results)
+
+        if errors and atomic:
+            return report(False)
+
+        creates = [index for index, operation in enumerate(operations)
+                   if operation["op"] == "create" and index in rows]
+        updates = [index for index, operation in enumerate(operations)
+                   if operation["op"] == "update" and index in rows]
+        deletes = [index for index, operation in enumerate(operations)
+                   if operation["op"] == "delete" and index not in errors]
+        if not (creates or updates or deletes):
+            return report(False)
+
+        ids = {}
+        try:
+            with unit_of_work(self.session):
+                self.version_repo.bump(resource_type)
+                if creates:
+                    ids = dict(zip(creates, create([rows[index] for index in creates])))
+                if updates:
+                    update([rows[index] for index in updates])
+                if deletes:
+                    delete([operations[index]["id"] for index in deletes])
+        except Exception as error:
+            return report(False, failure=f"Transaction annulée : {error.__cause__ or error}")
+        return report(True, ids)
@@ -1,23 +1,32 @@
 from datetime import datetime
 
-from db_config.connexion import session
-from repositories.clients.client_repository import ClientRepository
-
-client_repo = ClientRepository(session)
+from domain.unit_of_work import unit_of_work
+from models.models import ResourceTypeEnum
+from repositories.clients.client_repository import (AsyncClientRepository,
+                                                    ClientRepository)
+from repositories.profiles import projection_columns
+from repositories.versions.version_repository import VersionRepository
 
 
 class ClientApp:
-    def get_by_id(self, id):
-        return client_repo.get_by_id(id)
+    def __init__(self, session):
+        self.session = session
+        self.client_repo = ClientRepository(session)
+        self.version_repo = VersionRepository(session)
+
+    def get_by_id(self, id, profile=None):
+        return self.client_repo.get_by_id(id, profile)
 
     def create(self, **kwargs):
         kwargs["creation_date"] = datetime.now()
         kwargs["modified_date"] = datetime.now()
 
-        return client_repo.create_client(**kwargs)
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.CLIENT)
+            return self.client_repo.create_client(**kwargs)
 
     def update(self, id, **kwargs):
-        client = client_repo.get_by_id(id)
+        client = self.client_repo.get_by_id(id)
         if not client:
             return None
 
@@ -28,17 +37,28 @@ class ClientApp:
                 if hasattr(client, key):
                     setattr(client, key, value)
 
-        kwargs["modified_date"] = datetime.now()
+        client.modified_date = datetime.now()
 
-        client_repo.save_to_db()
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.CLIENT)
+            self.client_repo.save_to_db()
         return client
 
     def delete(self, id):
-        return client_repo.delete(id)
+        with unit_of_work(self.session):
+            deleted = self.client_repo.delete(id)
+            if deleted:
+                self.version_repo.bump(ResourceTypeEnum.CLIENT)
+        return deleted
+
+    def row_columns(self):
+        return projection_columns(self.client_repo.projections, "table")
+
+    def list_client_rows(self, limit=None, after=None, stream=False):
+        return self.client_repo.list_all_clients(limit, after, "table", stream)
 
-    @staticmethod
-    def add_client_column_to_table(table):
-        clients = client_repo.list_all_clients()
+    def add_client_column_to_table(self, table, limit=None, after=None):
+        clients, next_cursor = self.list_client_rows(limit, after)
 
         table.add_column("Identifiant", style="cyan")
         table.add_column("Nom complet", style="cyan")
@@ -60,8 +80,20 @@ class ClientApp:
                 client.company_name,
                 client.creation_date.strftime("%d/%m/%Y"),
                 client.modified_date.strftime("%d/%m/%Y"),
-                client.user.name
+                client.commercial_name or ""
             )
+        return next_cursor
+
+    def list_all_clients(self, limit=None, after=None, profile=None):
+        return self.client_repo.list_all_clients(limit, after, profile)
+
+
+class AsyncClientApp:
+    def __init__(self, session):
+        self.client_repo = AsyncClientRepository(session)
+
+    async def get_by_id(self, id, profile=None):
+        return await self.client_repo.get_by_id(id, profile)
 
-    def list_all_clients(self):
-        return client_repo.list_all_clients()
\ No newline at end of file
+    async def list_all_clients(self, limit=None, after=None, profile=None):
+        return await self.client_repo.list_all_clients(limit, after, profile)
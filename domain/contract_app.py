@@ -1,29 +1,38 @@
 import enum
 from datetime import datetime
 
-from db_config.connexion import session
-from repositories.contracts.contract_repository import ContractRepository
+from domain.unit_of_work import unit_of_work
+from models.models import ResourceTypeEnum
+from repositories.contracts.contract_repository import (
+    AsyncContractRepository, ContractRepository)
+from repositories.profiles import projection_columns
+from repositories.versions.version_repository import VersionRepository
 from utils import BasicFilters
 
-contract_repo = ContractRepository(session)
-
 
 class ContractApp:
     class ContractFilters(enum.Enum):
         UNSIGNED = "Contrats non signés"
         DUE = "Contrats non soldés"
 
-    def get_by_id(self, id):
-        return contract_repo.get_by_id(id)
+    def __init__(self, session):
+        self.session = session
+        self.contract_repo = ContractRepository(session)
+        self.version_repo = VersionRepository(session)
+
+    def get_by_id(self, id, profile=None):
+        return self.contract_repo.get_by_id(id, profile)
 
     def create(self, **kwargs):
         kwargs["creation_date"] = datetime.now()
         kwargs["modified_date"] = datetime.now()
 
-        return contract_repo.create_contract(**kwargs)
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.CONTRACT)
+            return self.contract_repo.create_contract(**kwargs)
 
     def update(self, id, **kwargs):
-        contract = contract_repo.get_by_id(id)
+        contract = self.contract_repo.get_by_id(id)
         if not contract:
             return None
 
@@ -34,25 +43,37 @@ class ContractApp:
                 if hasattr(contract, key):
                     setattr(contract, key, value)
 
-        kwargs["modified_date"] = datetime.now()
+        contract.modified_date = datetime.now()
 
-        contract_repo.save_to_db()
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.CONTRACT)
+            self.contract_repo.save_to_db()
         return contract
 
     def delete(self, id):
-        return contract_repo.delete(id)
+        with unit_of_work(self.session):
+            deleted = self.contract_repo.delete(id)
+            if deleted:
+                self.version_repo.bump(ResourceTypeEnum.CONTRACT)
+        return deleted
 
-    def add_contract_column_to_table(self, user, filter, table):
-        contract = []
+    def row_columns(self):
+        return projection_columns(self.contract_repo.projections, "table")
+
+    def list_contract_rows(self, user, filter, limit=None, after=None, stream=False):
         match filter:
             case BasicFilters.ALL.value:
-                contracts = contract_repo.list_all_contracts()
+                return self.contract_repo.list_all_contracts(limit, after, "table", stream)
             case BasicFilters.MINE.value:
-                contracts = contract_repo.list_user_contracts(user.id)
+                return self.contract_repo.list_user_contracts(user.id, limit, after, "table", stream)
             case self.ContractFilters.UNSIGNED.value:
-                contracts = contract_repo.list_all_unsigned_contracts()
+                return self.contract_repo.list_all_unsigned_contracts(limit, after, "table", stream)
             case self.ContractFilters.DUE.value:
-                contracts = contract_repo.list_all_due_contracts()
+                return self.contract_repo.list_all_due_contracts(limit, after, "table", stream)
+        raise ValueError(f"Filtre inconnu : {filter}")
+
+    def add_contract_column_to_table(self, user, filter, table, limit=None, after=None):
+        contracts, next_cursor = self.list_contract_rows(user, filter, limit, after)
 
         table.add_column("Identifiant", style="cyan")
         table.add_column("Nom du client", style="green")
@@ -69,15 +90,27 @@ class ContractApp:
         for contract in contracts:
             table.add_row(
                 f"{contract.id}",
-                contract.client.full_name,
-                f"{contract.client.email}\n{contract.client.telephone}",
-                contract.user.name,
+                contract.client_name,
+                f"{contract.client_email}\n{contract.client_telephone}",
+                contract.commercial_name or "",
                 f"{contract.amount} €",
                 f"{contract.due_amount} €",
                 contract.creation_date.strftime("%d/%m/%Y"),
                 contract.modified_date.strftime("%d/%m/%Y"),
                 contract.status.value,
             )
+        return next_cursor
+
+    def list_all_contracts(self, limit=None, after=None, profile=None):
+        return self.contract_repo.list_all_contracts(limit, after, profile)
+
+
+class AsyncContractApp:
+    def __init__(self, session):
+        self.contract_repo = AsyncContractRepository(session)
+
+    async def get_by_id(self, id, profile=None):
+        return await self.contract_repo.get_by_id(id, profile)
 
-    def list_all_contracts(self):
-        return contract_repo.list_all_contracts()
\ No newline at end of file
+    async def list_all_contracts(self, limit=None, after=None, profile=None):
+        return await self.contract_repo.list_all_contracts(limit, after, profile)
@@ -1,28 +1,37 @@
 import enum
 from datetime import datetime
 
-from db_config.connexion import session
-from repositories.events.event_repository import EventRepository
+from domain.unit_of_work import unit_of_work
+from models.models import ResourceTypeEnum
+from repositories.events.event_repository import (AsyncEventRepository,
+                                                  EventRepository)
+from repositories.profiles import projection_columns
+from repositories.versions.version_repository import VersionRepository
 from utils import BasicFilters
 
-event_repo = EventRepository(session)
-
 
 class EventApp:
     class EventFilters(enum.Enum):
         SUPPORT = "Evénements sans supports"
 
-    def get_by_id(self, id):
-        return event_repo.get_by_id(id)
+    def __init__(self, session):
+        self.session = session
+        self.event_repo = EventRepository(session)
+        self.version_repo = VersionRepository(session)
+
+    def get_by_id(self, id, profile=None):
+        return self.event_repo.get_by_id(id, profile)
 
     def create(self, **kwargs):
         kwargs["creation_date"] = datetime.now()
         kwargs["modified_date"] = datetime.now()
 
-        return event_repo.create_event(**kwargs)
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.EVENT)
+            return self.event_repo.create_event(**kwargs)
 
     def update(self, id, **kwargs):
-        event = event_repo.get_by_id(id)
+        event = self.event_repo.get_by_id(id)
         if not event:
             return None
 
@@ -33,23 +42,35 @@ class EventApp:
                 if hasattr(event, key):
                     setattr(event, key, value)
 
-        kwargs["modified_date"] = datetime.now()
+        event.modified_date = datetime.now()
 
-        event_repo.save_to_db()
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.EVENT)
+            self.event_repo.save_to_db()
         return event
 
     def delete(self, id):
-        return event_repo.delete(id)
+        with unit_of_work(self.session):
+            deleted = self.event_repo.delete(id)
+            if deleted:
+                self.version_repo.bump(ResourceTypeEnum.EVENT)
+        return deleted
 
-    def add_event_column_to_table(self, user, filter, table):
-        event = []
+    def row_columns(self):
+        return projection_columns(self.event_repo.projections, "table")
+
+    def list_event_rows(self, user, filter, limit=None, after=None, stream=False):
         match filter:
             case BasicFilters.ALL.value:
-                events = event_repo.list_all_events()
+                return self.event_repo.list_all_events(limit, after, "table", stream)
             case BasicFilters.MINE.value:
-                events = event_repo.list_user_events(user.id)
+                return self.event_repo.list_user_events(user.id, limit, after, "table", stream)
             case self.EventFilters.SUPPORT.value:
-                events = event_repo.list_no_support_events()
+                return self.event_repo.list_no_support_events(limit, after, "table", stream)
+        raise ValueError(f"Filtre inconnu : {filter}")
+
+    def add_event_column_to_table(self, user, filter, table, limit=None, after=None):
+        events, next_cursor = self.list_event_rows(user, filter, limit, after)
 
         table.add_column("Identifiant", style="cyan")
         table.add_column("Identifiant du contrat", style="light_salmon1")
@@ -66,16 +87,28 @@ class EventApp:
         for event in events:
             table.add_row(
                 f"{event.id}",
-                f"{event.contract.id}" if event.contract else "",
-                event.client.full_name,
-                f"{event.client.email}\n{event.client.telephone}",
+                f"{event.contract_id}" if event.contract_id else "",
+                event.client_name,
+                f"{event.client_email}\n{event.client_telephone}",
                 event.start.strftime("%d/%m/%Y %H:%M"),
                 event.end.strftime("%d/%m/%Y %H:%M"),
-                event.user.name,
+                event.support_name or "",
                 event.location,
                 f"{event.attendees}",
                 event.notes,
             )
+        return next_cursor
+
+    def list_all_events(self, limit=None, after=None, profile=None):
+        return self.event_repo.list_all_events(limit, after, profile)
+
+
+class AsyncEventApp:
+    def __init__(self, session):
+        self.event_repo = AsyncEventRepository(session)
+
+    async def get_by_id(self, id, profile=None):
+        return await self.event_repo.get_by_id(id, profile)
 
-    def list_all_events(self):
-        return event_repo.list_all_events()
\ No newline at end of file
+    async def list_all_events(self, limit=None, after=None, profile=None):
+        return await self.event_repo.list_all_events(limit, after, profile)
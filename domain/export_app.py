@@ -0,0 +1,96 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+
+from models.models import Clients, Contracts, Events
+from repositories.clients.client_repository import ClientRepository
+from repositories.contracts.contract_repository import ContractRepository
+from repositories.events.event_repository import EventRepository
+from repositories.streaming import DEFAULT_STREAM_BATCH, column_names
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CHUNK_SIZE = 64 * 1024
+EXPORT_COLUMNS = {
+    "clients": column_names(Clients),
+    "events": column_names(Events),
+    "contracts": column_names(Contracts),
+}
+
+
+def export_columns(resource, columns=None):
+    available = EXPORT_COLUMNS[resource]
+    if not columns:
+        return available
+    unknown = [name for name in columns if name not in available]
+    if unknown:
+        raise ValueError(
+            f"Colonne(s) inconnue(s) : {', '.join(unknown)}. Colonnes disponibles : {', '.join(available)}")
+    return list(columns)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _chunks(buffer, write_rows):
+    # Rows are written into a small in-memory buffer handed out every
+    # CHUNK_SIZE characters: one write per chunk instead of one per row.
+    for _ in write_rows():
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def to_ndjson(rows, columns):
+    buffer = io.StringIO()
+
+    def write_rows():
+        for row in rows:
+            buffer.write(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False))
+            yield buffer.write("\n")
+
+    return _chunks(buffer, write_rows)
+
+
+def to_csv(rows, columns, delimiter=","):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+
+    def write_rows():
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(map(_plain, row))
+
+    return _chunks(buffer, write_rows)
+
+
+def to_tsv(rows, columns):
+    return to_csv(rows, columns, delimiter="\t")
+
+
+FORMATTERS = {"ndjson": to_ndjson, "jsonl": to_ndjson, "csv": to_csv, "tsv": to_tsv}
+
+
+class ExportApp:
+    RESOURCES = tuple(EXPORT_COLUMNS)
+
+    def __init__(self, session):
+        self.repositories = {
+            "clients": ClientRepository(session),
+            "events": EventRepository(session),
+            "contracts": ContractRepository(session),
+        }
+
+    def export(self, resource, fmt, columns=None, batch_size=DEFAULT_STREAM_BATCH):
+        columns = export_columns(resource, columns)
+        rows = self.repositories[resource].export_rows(columns, batch_size)
+        return FORMATTERS[fmt](rows, columns)
@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from passlib.hash import argon2
+
+# argon2 costs tens of milliseconds of CPU and memory per call: run it in a
+# bounded process pool so a burst of logins cannot starve the API threadpool.
+# HASH_WORKERS=0 hashes inline, in the calling thread.
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", max(HASH_WORKERS, 1) * 4))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10))
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+
+
+class HashingOverloadedError(Exception):
+    pass
+
+
+def _hash(password):
+    return argon2.hash(password)
+
+
+def _verify(password, hashed):
+    return argon2.verify(password, hashed)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        return _executor
+
+
+def _run(fn, *args):
+    if HASH_WORKERS == 0:
+        return fn(*args)
+
+    # Running plus queued jobs are capped: past the limit, fail fast rather
+    # than letting callers pile up behind the pool.
+    if not _slots.acquire(blocking=False):
+        raise HashingOverloadedError("Trop de calculs de mots de passe en attente.")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        raise HashingOverloadedError("Le calcul du mot de passe a expiré.")
+
+
+def hash_password(password):
+    return _run(_hash, password)
+
+
+def verify_password(password, hashed):
+    return _run(_verify, password, hashed)
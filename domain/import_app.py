@@ -0,0 +1,229 @@
+import csv
+import json
+import re
+from datetime import datetime
+from typing import NamedTuple
+
+from domain.unit_of_work import unit_of_work
+from models.models import ContractStatusEnum, ResourceTypeEnum
+from repositories.clients.client_repository import ClientRepository
+from repositories.contracts.contract_repository import ContractRepository
+from repositories.events.event_repository import EventRepository
+from repositories.users.user_repository import UserRepository
+from repositories.versions.version_repository import VersionRepository
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
+
+
+def check_references(references, batch):
+    # One IN query per foreign key and batch instead of one per row.
+    invalid = {}
+    for key, repo in references.items():
+        ids = {row[key] for _, row in batch if row.get(key) is not None}
+        if not ids:
+            continue
+        missing = ids - repo.existing_ids(ids)
+        for position, row in batch:
+            if row.get(key) in missing:
+                invalid.setdefault(position, f"{key} {row[key]} inexistant")
+    return invalid
+
+
+class ImportReport(NamedTuple):
+    inserted: int
+    error_count: int
+    errors: list
+    last_line: int
+
+
+def read_records(file, fmt, start_line=1):
+    # Yields (line number, raw record) lazily: the file is never fully read
+    # in memory. Line numbers are physical lines, so a run can be resumed
+    # with start_line = last_line + 1.
+    if fmt == "jsonl":
+        for line_number, line in enumerate(file, start=1):
+            if line_number < start_line or not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, ValueError(f"JSON invalide : {error.msg}")
+    elif fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            if reader.line_num >= start_line:
+                yield reader.line_num, record
+    else:
+        raise ValueError(f"Format inconnu : {fmt}")
+
+
+def _text(record, key, required=True):
+    value = record.get(key)
+    if value in (None, ""):
+        if required:
+            raise ValueError(f"Champ obligatoire manquant : {key}")
+        return None
+    return str(value).strip()
+
+
+def _int(record, key, required=True):
+    value = _text(record, key, required)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{key} doit être un entier : {value}")
+
+
+def _datetime(record, key):
+    value = _text(record, key)
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{key} doit être une date ISO 8601 : {value}")
+
+
+def _email(record, key):
+    value = _text(record, key)
+    if not EMAIL_PATTERN.match(value):
+        raise ValueError(f"Le format de cet email n'est pas valide : {value}")
+    return value
+
+
+def _status(record, key):
+    value = _text(record, key)
+    for status in ContractStatusEnum:
+        if value in (status.value, status.name):
+            return status
+    raise ValueError(f"Statut inconnu : {value}")
+
+
+def validate_client(record):
+    return {
+        "full_name": _text(record, "full_name"),
+        "email": _email(record, "email"),
+        "telephone": _text(record, "telephone"),
+        "company_name": _text(record, "company_name"),
+        "user_id": _int(record, "user_id", required=False),
+    }
+
+
+def validate_event(record):
+    event = {
+        "start": _datetime(record, "start"),
+        "end": _datetime(record, "end"),
+        "location": _text(record, "location"),
+        "attendees": _int(record, "attendees"),
+        "notes": _text(record, "notes", required=False) or "",
+        "client_id": _int(record, "client_id"),
+        "user_id": _int(record, "user_id", required=False),
+    }
+    if event["end"] < event["start"]:
+        raise ValueError("La date de fin précède la date de début.")
+    return event
+
+
+def validate_contract(record):
+    contract = {
+        "amount": _int(record, "amount"),
+        "due_amount": _int(record, "due_amount"),
+        "status": _status(record, "status"),
+        "client_id": _int(record, "client_id"),
+        "event_id": _int(record, "event_id", required=False),
+        "user_id": _int(record, "user_id", required=False),
+    }
+    if not 0 <= contract["due_amount"] <= contract["amount"]:
+        raise ValueError("Le montant restant doit être compris entre 0 et le montant total.")
+    return contract
+
+
+class ImportApp:
+    RESOURCES = ("clients", "events", "contracts")
+
+    def __init__(self, session):
+        self.session = session
+        self.client_repo = ClientRepository(session)
+        self.event_repo = EventRepository(session)
+        self.contract_repo = ContractRepository(session)
+        self.user_repo = UserRepository(session)
+        self.version_repo = VersionRepository(session)
+        self.importers = {
+            "clients": (validate_client, self.client_repo.bulk_create_clients),
+            "events": (validate_event, self.event_repo.bulk_create_events),
+            "contracts": (validate_contract, self.contract_repo.bulk_create_contracts),
+        }
+        self.resource_types = {
+            "clients": ResourceTypeEnum.CLIENT,
+            "events": ResourceTypeEnum.EVENT,
+            "contracts": ResourceTypeEnum.CONTRACT,
+        }
+        self.references = {
+            "user_id": self.user_repo,
+            "client_id": self.client_repo,
+            "event_id": self.event_repo,
+        }
+
+    @staticmethod
+    def detect_format(filename):
+        return "jsonl" if filename.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+    def _flush(self, resource_type, insert, batch, report):
+        invalid = check_references(self.references, batch)
+        for line_number, message in invalid.items():
+            report["errors"].append((line_number, message))
+        rows = [row for line_number, row in batch if line_number not in invalid]
+        if not rows:
+            return
+        # One unit of work per batch: an interrupted import keeps the batches
+        # already committed and resumes with start_line.
+        try:
+            with unit_of_work(self.session):
+                self.version_repo.bump(resource_type)
+                insert(rows)
+            report["inserted"] += len(rows)
+        except Exception:
+            # Replay the batch row by row to pinpoint the failing records.
+            for line_number, row in batch:
+                if line_number in invalid:
+                    continue
+                try:
+                    with unit_of_work(self.session):
+                        self.version_repo.bump(resource_type)
+                        insert([row])
+                    report["inserted"] += 1
+                except Exception as error:
+                    report["errors"].append((line_number, str(error.__cause__ or error)))
+
+    def import_file(self, resource, file, fmt, owner_id, batch_size=DEFAULT_BATCH_SIZE, start_line=1):
+        validate, insert = self.importers[resource]
+        report = {"inserted": 0, "errors": [], "error_count": 0, "last_line": start_line - 1}
+        now = datetime.now()
+        batch = []
+        for line_number, record in read_records(file, fmt, start_line):
+            report["last_line"] = line_number
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                row = validate(record)
+            except ValueError as error:
+                report["errors"].append((line_number, str(error)))
+                continue
+            row["user_id"] = row["user_id"] or owner_id
+            row["creation_date"] = now
+            row["modified_date"] = now
+            batch.append((line_number, row))
+            if len(batch) >= batch_size:
+                self._flush(self.resource_types[resource], insert, batch, report)
+                batch = []
+            # Keep the report bounded on files with millions of bad rows.
+            if len(report["errors"]) > MAX_REPORTED_ERRORS:
+                report["error_count"] += len(report["errors"]) - MAX_REPORTED_ERRORS
+                del report["errors"][MAX_REPORTED_ERRORS:]
+        if batch:
+            self._flush(self.resource_types[resource], insert, batch, report)
+
+        report["error_count"] += len(report["errors"])
+        return ImportReport(**report)
@@ -0,0 +1,33 @@
+from domain.ttl_cache import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, TTLCache
+from models.models import PermissionTypeEnum, ResourceTypeEnum
+
+# One bit per (resource, action) pair: a user's permissions compile into a
+# single int and every check is a dict lookup plus a bitwise AND.
+PERMISSION_BITS = {}
+for resource_index, resource in enumerate(ResourceTypeEnum):
+    for action_index, action in enumerate(PermissionTypeEnum):
+        bit = 1 << (resource_index * len(PermissionTypeEnum) + action_index)
+        PERMISSION_BITS[(resource, action)] = bit
+        PERMISSION_BITS[(resource.value, action.value)] = bit
+
+# user id -> compiled mask. Bounded and expiring like the user snapshots:
+# writes from other processes only invalidate it through the TTL.
+permission_masks = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+def permission_bit(resource_type, permission_type):
+    return PERMISSION_BITS[(resource_type, permission_type)]
+
+
+def compile_permissions(pairs):
+    mask = 0
+    for resource_type, permission_type in pairs:
+        mask |= PERMISSION_BITS[(resource_type, permission_type)]
+    return mask
+
+
+def invalidate_permissions(user_id=None):
+    if user_id is None:
+        permission_masks.clear()
+    else:
+        permission_masks.pop(user_id)
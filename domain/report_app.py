@@ -0,0 +1,21 @@
+from domain.unit_of_work import unit_of_work
+from repositories.reports.report_repository import REPORTS, ReportRepository
+
+
+class ReportApp:
+    REPORTS = tuple(REPORTS)
+
+    def __init__(self, session):
+        self.session = session
+        self.report_repo = ReportRepository(session)
+
+    def report(self, name, limit=None, live=False):
+        if name not in REPORTS:
+            raise ValueError(f"Rapport inconnu : {name}")
+        return self.report_repo.report(name, limit, live)
+
+    def rebuild_summary(self):
+        if not self.report_repo.has_summary():
+            raise ValueError("La table de synthèse n'existe pas : lancer `migrate` (SQLite uniquement).")
+        with unit_of_work(self.session):
+            self.report_repo.rebuild_summary()
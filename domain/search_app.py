@@ -0,0 +1,12 @@
+from repositories.search.search_repository import (SEARCHABLE,
+                                                   SearchRepository)
+
+
+class SearchApp:
+    RESOURCES = SEARCHABLE
+
+    def __init__(self, session):
+        self.search_repo = SearchRepository(session)
+
+    def search(self, text, resources=SEARCHABLE, limit=20, offset=0):
+        return self.search_repo.search(text, resources, limit, offset)
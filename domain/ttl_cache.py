@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Shared by the per-process authentication caches (user snapshots and
+# permission masks): other workers see a change within AUTH_CACHE_TTL.
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 1024))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 60))
+
+
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
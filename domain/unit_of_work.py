@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def unit_of_work(session):
+    # Repositories only flush: the use case commits once, on exit, or rolls
+    # everything back. A nested unit (a use case calling another) joins the
+    # outer one instead of committing on its own.
+    if session.info.get("unit_of_work"):
+        yield session
+        return
+    session.info["unit_of_work"] = True
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop("unit_of_work", None)
@@ -1,33 +1,72 @@
-from passlib.hash import argon2
-
-from db_config.connexion import session
+from domain.auth_cache import UserSnapshot, invalidate_user, user_snapshots
+from domain.hashing import hash_password, verify_password
+from domain.permissions import (compile_permissions, permission_bit,
+                                permission_masks)
+from domain.unit_of_work import unit_of_work
 from models.models import (DepartmentEnum, PermissionTypeEnum,
                            ResourceTypeEnum, Users)
-from repositories.users.user_repository import UserRepository
-
-user_repo = UserRepository(session)
+from repositories.users.user_repository import (AsyncUserRepository,
+                                                UserRepository)
+from repositories.versions.version_repository import VersionRepository
+
+# Every permission a role or a per-user override can reference, and the
+# permissions of each department's role. `UserApp.sync_roles` writes them to
+# `permissions`, `roles` and `role_permissions`.
+PERMISSIONS = [(ptype, rtype) for rtype in ResourceTypeEnum for ptype in PermissionTypeEnum]
+DEPARTMENT_PERMISSIONS = {
+    DepartmentEnum.GESTION: [
+        (PermissionTypeEnum.CREATE, ResourceTypeEnum.USER),
+        (PermissionTypeEnum.CREATE, ResourceTypeEnum.CONTRACT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.USER),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.USER),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CONTRACT),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.EVENT),
+        (PermissionTypeEnum.DELETE, ResourceTypeEnum.USER),
+    ],
+    DepartmentEnum.COMMERCIAL: [
+        (PermissionTypeEnum.CREATE, ResourceTypeEnum.CLIENT),
+        (PermissionTypeEnum.CREATE, ResourceTypeEnum.EVENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.CLIENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CLIENT),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CONTRACT),
+    ],
+    DepartmentEnum.SUPPORT: [
+        (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.CLIENT),
+        (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
+        (PermissionTypeEnum.UPDATE, ResourceTypeEnum.EVENT),
+    ],
+}
 
 
 class UserApp:
-    def get_by_id(self, id):
-        return user_repo.get_by_id(id)
+    def __init__(self, session):
+        self.session = session
+        self.user_repo = UserRepository(session)
+        self.version_repo = VersionRepository(session)
+
+    def get_by_id(self, id, profile=None):
+        return self.user_repo.get_by_id(id, profile)
 
     def get_by_username(self, username):
-        return user_repo.get_by_username(username)
+        return self.user_repo.get_by_username(username)
 
     def get_by_id_and_username(self, id, username):
-        return user_repo.get_by_id_and_username(id, username)
+        return self.user_repo.get_by_id_and_username(id, username)
 
     def create(self, **kwargs):
         if "password" in kwargs:
-            kwargs["password"] = argon2.hash(kwargs["password"])
-        user = user_repo.create_user(**kwargs)
-        if "department" in kwargs:
-            self.set_permission(user=user)
-        return user
+            kwargs["password"] = hash_password(kwargs["password"])
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.USER)
+            return self.user_repo.create_user(**kwargs)
 
     def update(self, id, **kwargs):
-        user = user_repo.get_by_id(id)
+        user = self.user_repo.get_by_id(id)
         if not user:
             return None
 
@@ -38,60 +77,102 @@ class UserApp:
                 if hasattr(user, key):
                     setattr(user, key, value)
 
-        user_repo.save_to_db()
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.USER)
+            self.user_repo.save_to_db()
+        invalidate_user(user.id)
         return user
 
     def delete(self, id):
-        return user_repo.delete(id)
-
-    @staticmethod
-    def authentification(username, password):
-        user = user_repo.get_by_username(username)
+        with unit_of_work(self.session):
+            deleted = self.user_repo.delete(id)
+            if deleted:
+                self.version_repo.bump(ResourceTypeEnum.USER)
+        invalidate_user(id)
+        return deleted
+
+    def authentification(self, username, password):
+        user = self.user_repo.get_by_username(username)
         if user:
-            if argon2.verify(password, user.password):
+            if verify_password(password, user.password):
                 return user
 
-    @staticmethod
-    def jwt_authentification(id, username):
-        return user_repo.get_by_id_and_username(id, username)
-
-    def set_permission(self, user):
-        if user.department.value == DepartmentEnum.GESTION.value:
-            perms_list = [
-                (PermissionTypeEnum.CREATE, ResourceTypeEnum.USER),
-                (PermissionTypeEnum.CREATE, ResourceTypeEnum.CONTRACT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.USER),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.USER),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CONTRACT),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.EVENT),
-                (PermissionTypeEnum.DELETE, ResourceTypeEnum.USER),
-            ]
-            user_repo.bulk_update_permissions(user, perms_list)
-        elif user.department.value == DepartmentEnum.COMMERCIAL.value:
-            perms_list = [
-                (PermissionTypeEnum.CREATE, ResourceTypeEnum.CLIENT),
-                (PermissionTypeEnum.CREATE, ResourceTypeEnum.EVENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.CLIENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CLIENT),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.CONTRACT),
-            ]
-            user_repo.bulk_update_permissions(user, perms_list)
-        elif user.department.value == DepartmentEnum.SUPPORT.value:
-            perms_list = [
-                (PermissionTypeEnum.READ, ResourceTypeEnum.EVENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.CLIENT),
-                (PermissionTypeEnum.READ, ResourceTypeEnum.CONTRACT),
-                (PermissionTypeEnum.UPDATE, ResourceTypeEnum.EVENT),
+    def jwt_authentification(self, id, username):
+        return self.user_repo.get_by_id_and_username(id, username)
+
+    def jwt_snapshot(self, id, username):
+        snapshot = user_snapshots.get(id)
+        if snapshot is None or snapshot.username != username:
+            user = self.user_repo.get_by_id_and_username(id, username)
+            if not user:
+                return None
+            # Recompiled with the snapshot, never taken from an older cache
+            # entry: changes made by other processes show up within the TTL.
+            mask = compile_permissions(self.user_repo.list_permission_pairs(user.id))
+            permission_masks.set(user.id, mask)
+            snapshot = UserSnapshot.from_user(user, mask)
+            user_snapshots.set(id, snapshot)
+        return snapshot
+
+    def grant_permissions(self, user, permissions_list):
+        # Per-user overrides, on top of the permissions of the user's role.
+        with unit_of_work(self.session):
+            self.version_repo.bump(ResourceTypeEnum.USER)
+            self.user_repo.bulk_update_permissions(user, permissions_list)
+        invalidate_user(user.id)
+
+    def sync_roles(self):
+        # Writes the missing permissions, roles and role permissions, then
+        # drops the per-user rows their role now grants. Returns the number of
+        # role permissions added and of user rows removed.
+        with unit_of_work(self.session):
+            self.user_repo.add_missing_permissions(PERMISSIONS)
+            permission_ids = self.user_repo.permission_ids()
+            grants = [
+                (department, permission_ids[pair])
+                for department, pairs in DEPARTMENT_PERMISSIONS.items()
+                for pair in pairs
             ]
-            user_repo.bulk_update_permissions(user, perms_list)
+            self.user_repo.add_missing_roles(DEPARTMENT_PERMISSIONS)
+            added = self.user_repo.add_missing_role_permissions(grants)
+            removed = self.user_repo.prune_permissions()
+            if added or removed:
+                self.version_repo.bump(ResourceTypeEnum.USER)
+        if added or removed:
+            invalidate_user()
+        return added, removed
+
+    def permission_mask(self, user) -> int:
+        if isinstance(user, UserSnapshot):
+            return user.permission_mask
+        mask = permission_masks.get(user.id)
+        if mask is None:
+            mask = compile_permissions(self.user_repo.list_permission_pairs(user.id))
+            permission_masks.set(user.id, mask)
+        return mask
 
     def has_permission(self, user: Users, resource_type: str, permission_type: str) -> bool:
-        return any(
-            p.resource_type == ResourceTypeEnum(
-                resource_type) and p.permission_type == PermissionTypeEnum(permission_type)
-            for p in user.permissions
-        )
+        return bool(self.permission_mask(user) & permission_bit(resource_type, permission_type))
+
+
+class AsyncUserApp:
+    def __init__(self, session):
+        self.user_repo = AsyncUserRepository(session)
+
+    async def get_by_id(self, id, profile=None):
+        return await self.user_repo.get_by_id(id, profile)
+
+    async def get_by_id_and_username(self, id, username):
+        return await self.user_repo.get_by_id_and_username(id, username)
+
+    async def jwt_snapshot(self, id, username):
+        snapshot = user_snapshots.get(id)
+        if snapshot is None or snapshot.username != username:
+            user = await self.user_repo.get_by_id_and_username(id, username)
+            if not user:
+                return None
+            mask = compile_permissions(await self.user_repo.list_permission_pairs(user.id))
+            permission_masks.set(user.id, mask)
+            snapshot = UserSnapshot.from_user(user, mask)
+            user_snapshots.set(id, snapshot)
+        return snapshot
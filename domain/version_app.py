@@ -0,0 +1,72 @@
+from models.models import ResourceTypeEnum
+from repositories.versions.version_repository import (AsyncVersionRepository,
+                                                      VersionRepository)
+
+# Resource types whose data each API representation embeds ("api-detail"
+# profile) or references: a write to any of them changes the payload, hence
+# the ETag. Deleting an event clears `contracts.event_id` without touching
+# the contracts' modified_date, so contracts depend on events too.
+EMBEDDED_TYPES = {
+    ResourceTypeEnum.USER: (ResourceTypeEnum.USER,),
+    ResourceTypeEnum.CLIENT: (ResourceTypeEnum.CLIENT, ResourceTypeEnum.USER),
+    ResourceTypeEnum.CONTRACT: (ResourceTypeEnum.CONTRACT, ResourceTypeEnum.EVENT,
+                                ResourceTypeEnum.CLIENT, ResourceTypeEnum.USER),
+    ResourceTypeEnum.EVENT: (ResourceTypeEnum.EVENT, ResourceTypeEnum.CONTRACT,
+                             ResourceTypeEnum.CLIENT, ResourceTypeEnum.USER),
+}
+
+
+def make_etag(*parts):
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def list_etag(resource_type, limit, after, versions):
+    # Each page of a listing is its own representation: the page bounds are
+    # part of the tag. No cursor and cursor 0 return the same first page.
+    return make_etag(resource_type.value, "list", limit, after or 0, *versions)
+
+
+def detail_types(resource_type):
+    # A resource's own changes show in its modified_date; only the types it
+    # embeds need their counters. Users have no modified_date.
+    if resource_type == ResourceTypeEnum.USER:
+        return EMBEDDED_TYPES[resource_type]
+    return EMBEDDED_TYPES[resource_type][1:]
+
+
+def detail_etag(resource_type, id, modified_date, versions):
+    if resource_type == ResourceTypeEnum.USER:
+        return make_etag(resource_type.value, id, *versions)
+    if modified_date is None:
+        return None
+    return make_etag(resource_type.value, id, int(modified_date.timestamp() * 1_000_000), *versions)
+
+
+class VersionApp:
+    def __init__(self, session):
+        self.version_repo = VersionRepository(session)
+
+    def list_etag(self, resource_type, limit, after):
+        return list_etag(resource_type, limit, after, self.version_repo.versions(EMBEDDED_TYPES[resource_type]))
+
+    def detail_etag(self, resource_type, id):
+        modified_date = None
+        if resource_type != ResourceTypeEnum.USER:
+            modified_date = self.version_repo.modified_date(resource_type, id)
+        return detail_etag(resource_type, id, modified_date,
+                           self.version_repo.versions(detail_types(resource_type)))
+
+
+class AsyncVersionApp:
+    def __init__(self, session):
+        self.version_repo = AsyncVersionRepository(session)
+
+    async def list_etag(self, resource_type, limit, after):
+        return list_etag(resource_type, limit, after, await self.version_repo.versions(EMBEDDED_TYPES[resource_type]))
+
+    async def detail_etag(self, resource_type, id):
+        modified_date = None
+        if resource_type != ResourceTypeEnum.USER:
+            modified_date = await self.version_repo.modified_date(resource_type, id)
+        return detail_etag(resource_type, id, modified_date,
+                           await self.version_repo.versions(detail_types(resource_type)))
@@ -36,6 +36,14 @@ class PermissionTypeEnum(enum.Enum):
     DELETE = "delete"
 
 
+roles_permissions_association = Table(
+    "role_permissions",
+    Base.metadata,
+    db.Column("department", db.Enum(DepartmentEnum), db.ForeignKey("roles.department"), primary_key=True),
+    db.Column("permission_id", db.ForeignKey("permissions.id"), primary_key=True),
+)
+
+
 class ContractStatusEnum(enum.Enum):
     SIGNED = "Signé"
     NOT_SIGNED = "Non signé"
@@ -48,12 +56,12 @@ class Resources(Base):
                        "polymorphic_on": "type"}
 
     id = db.Column(db.Integer, primary_key=True)
-    type = db.Column(db.String)
+    type = db.Column(db.String, index=True)
     creation_date = db.Column(
         db.TIMESTAMP, server_default=db.text("CURRENT_TIMESTAMP"))
     modified_date = db.Column(
         db.TIMESTAMP, server_default=db.text("CURRENT_TIMESTAMP"))
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     user = relationship("Users", backref="resources")
 
 
@@ -63,15 +71,21 @@ class Users(Base):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     email = db.Column(db.String)
-    username = db.Column(db.String)
+    username = db.Column(db.String, index=True)
     password = db.Column(db.String)
     department = db.Column(db.Enum(DepartmentEnum))
+    # Per-user overrides, granted on top of the permissions of the role.
     permissions = relationship(
         "Permissions",
         secondary=users_permissions_association,
         back_populates="users",
         collection_class=set,
     )
+    role = relationship(
+        "Roles",
+        primaryjoin="Roles.department == foreign(Users.department)",
+        viewonly=True,
+    )
 
     def __repr__(self):
         return f"User {self.name}"
@@ -98,6 +112,28 @@ class Permissions(Base):
     )
 
 
+class Roles(Base):
+    # One role per department: users get its permissions through their
+    # department instead of a copy of them each.
+    __tablename__ = "roles"
+
+    department = db.Column(db.Enum(DepartmentEnum), primary_key=True)
+    permissions = relationship(
+        "Permissions",
+        secondary=roles_permissions_association,
+        collection_class=set,
+    )
+
+
+class ResourceVersions(Base):
+    # One counter per resource type, bumped by the domain layer on every
+    # write: the API derives its ETags from it.
+    __tablename__ = "resource_versions"
+
+    resource_type = db.Column(db.Enum(ResourceTypeEnum), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
 class Clients(Resources):
     __tablename__ = "clients"
     __mapper_args__ = {"polymorphic_identity": "client"}
@@ -128,10 +164,23 @@ class Contracts(Resources):
 
     id = db.Column(db.Integer, db.ForeignKey("resources.id"), primary_key=True)
     amount = db.Column(db.Integer)
-    due_amount = db.Column(db.Integer)
-    status = db.Column(db.Enum(ContractStatusEnum))
-    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"))
-    event_id = db.Column(db.Integer, db.ForeignKey("events.id"))
+    due_amount = db.Column(db.Integer, index=True)
+    status = db.Column(db.Enum(ContractStatusEnum), index=True)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), index=True)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), index=True)
+
+    # Partial index backing the "non soldés" filter, only created where
+    # partial indexes exist (elsewhere it would duplicate the primary key).
+    # "Non signés" needs none: ix_contracts_status already returns the rows
+    # of one status in id order.
+    __table_args__ = (
+        db.Index(
+            "ix_contracts_due_partial", id,
+            sqlite_where=due_amount > 0,
+            postgresql_where=due_amount > 0,
+            info={"dialects": ("sqlite", "postgresql")},
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+    )
 
     client = relationship(
         "Clients",
@@ -162,12 +211,12 @@ class Events(Resources):
     __mapper_args__ = {"polymorphic_identity": "event"}
 
     id = db.Column(db.Integer, db.ForeignKey("resources.id"), primary_key=True)
-    start = db.Column(db.DateTime)
+    start = db.Column(db.DateTime, index=True)
     end = db.Column(db.DateTime)
     location = db.Column(db.Text)
     attendees = db.Column(db.Integer)
     notes = db.Column(db.Text)
-    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"))
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), index=True)
 
     client = relationship(
         "Clients",
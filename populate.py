@@ -1,113 +1,50 @@
-from datetime import datetime
+import itertools
+import random
+from datetime import datetime, timedelta
 
 import sqlalchemy as db
 
-from db_config.connexion import engine
+from db_config.triggers import deferred_triggers
 from domain.client_app import ClientApp
 from domain.contract_app import ContractApp
 from domain.event_app import EventApp
+from domain.hashing import hash_password
 from domain.user_app import UserApp
 from models.models import (Clients, Contracts, ContractStatusEnum,
-                           DepartmentEnum, Events, Permissions,
-                           PermissionTypeEnum, ResourceTypeEnum, Users)
+                           DepartmentEnum, Events, ResourceTypeEnum, Users)
+from repositories.bulk import bulk_create
+from repositories.versions.version_repository import VersionRepository
 
-user_app = UserApp()
-client_app = ClientApp()
-event_app = EventApp()
-contract_app = ContractApp()
+SCALE_BATCH_SIZE = 50_000
+SCALE_PASSWORD = "password"
+CITIES = ["Paris", "Lyon", "Marseille", "Bordeaux", "Nantes", "Lille", "Tours", "Blois", "Annecy", "Nice"]
+COMPANY_SUFFIXES = ["SAS", "SARL", "LLC", "SA", "Group"]
+
+
+def zipf_weights(count, exponent=1.1):
+    # A few owners and clients carry most of the rows, as in real CRMs.
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def batched(rows, size=SCALE_BATCH_SIZE):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
 
 
 class Populator:
     def __init__(self, session):
         self.session = session
-
-    def _populate_permission_table(self):
-        if (
-            not self.session.query(Permissions)
-            .filter_by(
-                permission_type=PermissionTypeEnum.CREATE,
-                resource_type=ResourceTypeEnum.CLIENT,
-            )
-            .one_or_none()
-        ):
-            with engine.connect() as conn:
-                result = conn.execute(
-                    db.insert(Permissions),
-                    [
-                        {
-                            "permission_type": PermissionTypeEnum.CREATE,
-                            "resource_type": ResourceTypeEnum.CLIENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.READ,
-                            "resource_type": ResourceTypeEnum.CLIENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.UPDATE,
-                            "resource_type": ResourceTypeEnum.CLIENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.DELETE,
-                            "resource_type": ResourceTypeEnum.CLIENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.CREATE,
-                            "resource_type": ResourceTypeEnum.CONTRACT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.READ,
-                            "resource_type": ResourceTypeEnum.CONTRACT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.UPDATE,
-                            "resource_type": ResourceTypeEnum.CONTRACT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.DELETE,
-                            "resource_type": ResourceTypeEnum.CONTRACT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.CREATE,
-                            "resource_type": ResourceTypeEnum.EVENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.READ,
-                            "resource_type": ResourceTypeEnum.EVENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.UPDATE,
-                            "resource_type": ResourceTypeEnum.EVENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.DELETE,
-                            "resource_type": ResourceTypeEnum.EVENT,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.CREATE,
-                            "resource_type": ResourceTypeEnum.USER,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.READ,
-                            "resource_type": ResourceTypeEnum.USER,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.UPDATE,
-                            "resource_type": ResourceTypeEnum.USER,
-                        },
-                        {
-                            "permission_type": PermissionTypeEnum.DELETE,
-                            "resource_type": ResourceTypeEnum.USER,
-                        },
-                    ],
-                )
-                conn.commit()
-                return result
+        self.user_app = UserApp(session)
+        self.client_app = ClientApp(session)
+        self.event_app = EventApp(session)
+        self.contract_app = ContractApp(session)
 
     def _populate_users_test_data(self):
         user_select = db.select(Users).where(Users.username == "support")
         user = self.session.execute(user_select).scalars().all()
         if not user:
-            user_app.create(
+            self.user_app.create(
                 **{
                     "username": "support",
                     "password": "support",
@@ -120,7 +57,7 @@ class Populator:
         user_select = db.select(Users).where(Users.username == "commercial")
         user = self.session.execute(user_select).scalars().all()
         if not user:
-            user_app.create(
+            self.user_app.create(
                 **{
                     "username": "commercial",
                     "password": "commercial",
@@ -133,7 +70,7 @@ class Populator:
         user_select = db.select(Users).where(Users.username == "gestion")
         user = self.session.execute(user_select).scalars().all()
         if not user:
-            user_app.create(
+            self.user_app.create(
                 **{
                     "username": "gestion",
                     "password": "gestion",
@@ -143,14 +80,8 @@ class Populator:
                 },
             )
 
-    def _populate_existing_users_permissions(self):
-        users_select = db.select(Users)
-        users = self.session.execute(users_select).scalars().all()
-
-        for user in users:
-            user_app.set_permission(user)
-
-        self.session.commit()
+    def _populate_roles(self):
+        return self.user_app.sync_roles()
 
     def _populate_test_data(self):
         user_select = db.select(Users).where(Users.username == "commercial")
@@ -160,7 +91,7 @@ class Populator:
         client = self.session.execute(client_select).scalars().all()
 
         if not client:
-            client_app.create(
+            self.client_app.create(
                 **{
                     "full_name": "Kevin Casey",
                     "email": "kevin@startup.io",
@@ -174,7 +105,7 @@ class Populator:
         created_client = self.session.execute(client_select).scalars().first()
 
         if not created_client:
-            created_client = client_app.create(
+            created_client = self.client_app.create(
                 **{
                     "full_name": "John Ouick",
                     "email": "john.ouick@gmail.com",
@@ -190,7 +121,7 @@ class Populator:
         created_contract = self.session.execute(contract_select).scalars().first()
 
         if not created_contract:
-            created_contract = contract_app.create(
+            created_contract = self.contract_app.create(
                 **{
                     "amount": 1000,
                     "due_amount": 500,
@@ -210,7 +141,7 @@ class Populator:
         event = self.session.execute(event_select).scalars().all()
 
         if not event:
-            event_app.create(
+            self.event_app.create(
                 **{
                     "start": datetime(year=2023, month=6, day=4, hour=13),
                     "end": datetime(year=2023, month=6, day=5, hour=2),
@@ -224,8 +155,112 @@ class Populator:
                 },
             )
 
+    def _bulk_insert(self, table, rows):
+        connection = self.session.connection()
+        for batch in batched(rows):
+            connection.execute(db.insert(table), batch)
+        self.session.commit()
+
+    def _bulk_create(self, model, rows):
+        ids = []
+        for batch in batched(rows):
+            ids.extend(bulk_create(self.session, model, batch))
+        return ids
+
+    def populate_scale(self, scale, seed=0):
+        # `scale` clients, events and contracts plus one user per 1000
+        # clients; the same seed always generates the same data.
+        rng = random.Random(seed)
+        now = datetime(2025, 1, 1)
+
+        password = hash_password(SCALE_PASSWORD)
+        first_user = (self.session.execute(db.select(db.func.max(Users.id))).scalar() or 0) + 1
+        departments = rng.choices(
+            [DepartmentEnum.COMMERCIAL, DepartmentEnum.SUPPORT, DepartmentEnum.GESTION],
+            weights=[6, 3, 1], k=max(scale // 1000, 3),
+        )
+        departments[:3] = [DepartmentEnum.COMMERCIAL, DepartmentEnum.SUPPORT, DepartmentEnum.GESTION]
+        users = [
+            {
+                "id": first_user + index,
+                "name": f"Utilisateur {first_user + index}",
+                "email": f"user{first_user + index}@tartala.fr",
+                "username": f"user{first_user + index}",
+                "password": password,
+                "department": department,
+            }
+            for index, department in enumerate(departments)
+        ]
+        self._bulk_insert(Users.__table__, users)
+
+        self._populate_roles()
+
+        commercials = [user["id"] for user in users if user["department"] == DepartmentEnum.COMMERCIAL]
+        supports = [user["id"] for user in users if user["department"] == DepartmentEnum.SUPPORT]
+        commercial_weights = zipf_weights(len(commercials))
+        support_weights = zipf_weights(len(supports))
+        client_weights = zipf_weights(scale)
+
+        def created():
+            date = now - timedelta(days=rng.expovariate(1 / 365))
+            return {"creation_date": date, "modified_date": date + timedelta(days=rng.random() * 30)}
+
+        client_owners = rng.choices(commercials, cum_weights=commercial_weights, k=scale)
+        connection = self.session.connection()
+        with deferred_triggers(connection):
+            clients = self._bulk_create(Clients, (
+                {
+                    "user_id": owner,
+                    **created(),
+                    "full_name": f"Client {number}",
+                    "email": f"client{number}@example.com",
+                    "telephone": f"+33 6 {number % 100:02} {number // 100 % 100:02} {number // 10000 % 100:02} 00",
+                    "company_name": f"Entreprise {number % (scale // 5 + 1)} {COMPANY_SUFFIXES[number % 5]}",
+                }
+                for number, owner in enumerate(client_owners, 1)
+            ))
+
+            # Events and contracts go to clients along a Zipf curve; one event
+            # in five has no support contact yet, and most events have a
+            # contract.
+            event_clients = rng.choices(range(scale), cum_weights=client_weights, k=scale)
+
+            def event(client):
+                start = now + timedelta(days=rng.uniform(-365, 365), hours=rng.randrange(8, 20))
+                return {
+                    "user_id": rng.choices(supports, cum_weights=support_weights)[0] if rng.random() > 0.2 else None,
+                    **created(),
+                    "start": start,
+                    "end": start + timedelta(hours=rng.randrange(2, 48)),
+                    "location": f"{rng.randrange(1, 200)} rue de la Paix, {rng.choice(CITIES)}",
+                    "attendees": int(rng.paretovariate(1.5) * 20),
+                    "notes": "",
+                    "client_id": clients[client],
+                }
+
+            events = self._bulk_create(Events, (event(client) for client in event_clients))
+
+            def contract(index):
+                amount = int(rng.lognormvariate(8, 1))
+                signed = rng.random() < 0.7
+                with_event = index < scale * 0.8
+                return {
+                    "user_id": client_owners[event_clients[index]] if with_event else rng.choice(commercials),
+                    **created(),
+                    "amount": amount,
+                    "due_amount": 0 if signed and rng.random() < 0.6 else rng.randrange(amount + 1),
+                    "status": ContractStatusEnum.SIGNED if signed else ContractStatusEnum.NOT_SIGNED,
+                    "client_id": clients[event_clients[index]] if with_event else rng.choice(clients),
+                    "event_id": events[index] if with_event else None,
+                }
+
+            self._bulk_create(Contracts, (contract(index) for index in range(scale)))
+            VersionRepository(self.session).bump(*ResourceTypeEnum)
+        self.session.commit()
+        return len(users), scale
+
     def populate(self):
-        self._populate_permission_table()
+        roles = self._populate_roles()
         self._populate_users_test_data()
-        self._populate_existing_users_permissions()
         self._populate_test_data()
+        return roles
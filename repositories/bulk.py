@@ -0,0 +1,58 @@
+import sqlalchemy as db
+
+from models.models import Resources
+from repositories.streaming import column_names
+
+
+def rows_by_id(session, model, ids):
+    query = db.select(*(getattr(model, name) for name in column_names(model))).where(model.id.in_(ids))
+    return {row.id: row._asdict() for row in session.execute(query)}
+
+
+def bulk_create(session, model, rows):
+    if not rows:
+        return []
+    connection = session.connection()
+    if connection.dialect.name == "sqlite":
+        # SQLite cannot order RETURNING rows, so SQLAlchemy would insert
+        # joined-inheritance rows one at a time. Ids are allocated here instead
+        # and each table gets one core executemany. The empty DELETE takes the
+        # database write lock before max(id) is read, so a concurrent writer
+        # waits instead of allocating the same ids.
+        resources = Resources.__table__
+        connection.execute(db.delete(resources).where(db.false()))
+        first = (connection.execute(db.select(db.func.max(resources.c.id))).scalar() or 0) + 1
+        ids = range(first, first + len(rows))
+        halves = ((resources, {"type": model.__mapper__.polymorphic_identity}), (model.__table__, {}))
+        for table, extra in halves:
+            columns = [name for name in rows[0] if name in table.c]
+            connection.execute(db.insert(table), [
+                {**{name: row[name] for name in columns}, "id": id, **extra} for id, row in zip(ids, rows)
+            ])
+        return list(ids)
+    # insertmanyvalues: multi-row INSERT ... RETURNING, ids in `rows` order.
+    # render_nulls keeps None values in the statement: rows whose set of
+    # non-NULL keys differ would otherwise be split into separate batches.
+    query = (db.insert(model).execution_options(render_nulls=True)
+             .returning(model.id, sort_by_parameter_order=True))
+    return session.scalars(query, rows).all()
+
+
+def bulk_update(session, model, rows):
+    # ORM bulk UPDATE by primary key: one executemany per table and key set.
+    session.execute(db.update(model), rows)
+
+
+def bulk_delete(session, model, ids, references=()):
+    # Same outcome as session.delete() on each row, in a few statements:
+    # references are cleared, then the subtype rows go before their
+    # `resources` half.
+    for column in references:
+        session.execute(db.update(column.class_).where(column.in_(ids)).values({column.key: None}))
+    resources = Resources.__table__
+    session.execute(db.delete(model.__table__).where(model.__table__.c.id.in_(ids)))
+    deleted = session.execute(
+        db.delete(resources)
+        .where(resources.c.id.in_(ids), resources.c.type == model.__mapper__.polymorphic_identity)
+    )
+    return deleted.rowcount
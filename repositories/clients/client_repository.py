@@ -1,32 +1,92 @@
 import sqlalchemy as db
+from sqlalchemy.orm import selectinload
 
-from models.models import Clients
+from models.models import Clients, Contracts, Events, Users
+from repositories.bulk import (bulk_create, bulk_delete, bulk_update,
+                               rows_by_id)
+from repositories.pagination import async_paginate, paginate
+from repositories.profiles import select_profile
+from repositories.streaming import stream_columns
+from repositories.users.user_repository import with_permissions
+
+
+def client_table_rows():
+    return (
+        db.select(
+            Clients.id,
+            Clients.full_name,
+            Clients.email,
+            Clients.telephone,
+            Clients.company_name,
+            Clients.creation_date,
+            Clients.modified_date,
+            Users.name.label("commercial_name"),
+        )
+        .select_from(Clients)
+        .outerjoin(Users, Users.id == Clients.user_id)
+    )
 
 
 class ClientRepository:
+    loading_profiles = {
+        "api-detail": [with_permissions(selectinload(Clients.user))],
+    }
+    projections = {"table": client_table_rows}
+
     def __init__(self, session):
         self.session = session
 
-    def get_by_id(self, id):
-        pass_query = db.select(Clients).where(Clients.id == id)
+    @classmethod
+    def _select(cls, profile=None):
+        return select_profile(Clients, cls.loading_profiles, profile, cls.projections)
+
+    def get_by_id(self, id, profile=None):
+        pass_query = self._select(profile).where(Clients.id == id)
         return self.session.execute(pass_query).scalar_one_or_none()
 
-    def list_all_clients(self):
-        return self.session.execute(db.select(Clients)).scalars().all()
+    def list_all_clients(self, limit=None, after=None, profile=None, stream=False):
+        return paginate(self.session, self._select(profile), Clients.id, limit, after, stream)
 
     def create_client(self, **kwargs):
         client = Clients(**kwargs)
         self.session.add(client)
-        self.session.commit()
+        self.session.flush()
         return client
 
+    def bulk_create_clients(self, rows):
+        return bulk_create(self.session, Clients, rows)
+
+    def bulk_update_clients(self, rows):
+        bulk_update(self.session, Clients, rows)
+
+    def bulk_delete_clients(self, ids):
+        return bulk_delete(self.session, Clients, ids, (Events.client_id, Contracts.client_id))
+
+    def rows_by_id(self, ids):
+        return rows_by_id(self.session, Clients, ids)
+
+    def existing_ids(self, ids):
+        query = db.select(Clients.id).where(Clients.id.in_(ids))
+        return set(self.session.execute(query).scalars())
+
+    def export_rows(self, columns, batch_size):
+        return stream_columns(self.session, Clients, columns, batch_size)
+
     def save_to_db(self):
-        self.session.commit()
+        self.session.flush()
 
     def delete(self, client_id):
-        client = self.get_by_id(client_id)
-        if client:
-            self.session.delete(client)
-            self.save_to_db()
-            return True
-        return False
+        return bulk_delete(self.session, Clients, [client_id], (Events.client_id, Contracts.client_id)) > 0
+
+
+class AsyncClientRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_by_id(self, id, profile=None):
+        pass_query = ClientRepository._select(profile).where(Clients.id == id)
+        return (await self.session.execute(pass_query)).scalar_one_or_none()
+
+    async def list_all_clients(self, limit=None, after=None, profile=None):
+        query = ClientRepository._select(profile)
+        return await async_paginate(self.session, query, Clients.id, limit, after)
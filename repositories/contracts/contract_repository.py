@@ -1,41 +1,114 @@
 import sqlalchemy as db
+from sqlalchemy.orm import selectinload
 
-from models.models import Contracts, ContractStatusEnum
+from models.models import Clients, Contracts, ContractStatusEnum, Users
+from repositories.bulk import (bulk_create, bulk_delete, bulk_update,
+                               rows_by_id)
+from repositories.pagination import async_paginate, paginate
+from repositories.profiles import select_profile
+from repositories.streaming import stream_columns
+from repositories.users.user_repository import with_permissions
+
+
+def contract_table_rows():
+    # The client half of the join uses the bare `clients` table: going
+    # through the Clients entity would join `resources` a second time.
+    clients = Clients.__table__
+    return (
+        db.select(
+            Contracts.id,
+            clients.c.full_name.label("client_name"),
+            clients.c.email.label("client_email"),
+            clients.c.telephone.label("client_telephone"),
+            Users.name.label("commercial_name"),
+            Contracts.amount,
+            Contracts.due_amount,
+            Contracts.creation_date,
+            Contracts.modified_date,
+            Contracts.status,
+        )
+        .select_from(Contracts)
+        .outerjoin(clients, clients.c.id == Contracts.client_id)
+        .outerjoin(Users, Users.id == Contracts.user_id)
+    )
 
 
 class ContractRepository:
+    loading_profiles = {
+        "api-detail": [
+            with_permissions(selectinload(Contracts.user)),
+            with_permissions(selectinload(Contracts.client).selectinload(Clients.user)),
+        ],
+    }
+
+    projections = {"table": contract_table_rows}
+
     def __init__(self, session):
         self.session = session
 
-    def get_by_id(self, id):
-        pass_query = db.select(Contracts).where(Contracts.id == id)
+    @classmethod
+    def _select(cls, profile=None):
+        return select_profile(Contracts, cls.loading_profiles, profile, cls.projections)
+
+    def get_by_id(self, id, profile=None):
+        pass_query = self._select(profile).where(Contracts.id == id)
         return self.session.execute(pass_query).scalar_one_or_none()
 
-    def list_all_contracts(self):
-        return self.session.execute(db.select(Contracts)).scalars().all()
+    def list_all_contracts(self, limit=None, after=None, profile=None, stream=False):
+        return paginate(self.session, self._select(profile), Contracts.id, limit, after, stream)
 
-    def list_user_contracts(self, user_id):
-        return self.session.execute(db.select(Contracts).where(Contracts.user_id == user_id)).scalars().all()
+    def list_user_contracts(self, user_id, limit=None, after=None, profile=None, stream=False):
+        query = self._select(profile).where(Contracts.user_id == user_id)
+        return paginate(self.session, query, Contracts.id, limit, after, stream)
 
-    def list_all_unsigned_contracts(self):
-        return self.session.execute(db.select(Contracts).where(Contracts.status == ContractStatusEnum.NOT_SIGNED)).scalars().all()
+    def list_all_unsigned_contracts(self, limit=None, after=None, profile=None, stream=False):
+        query = self._select(profile).where(Contracts.status == ContractStatusEnum.NOT_SIGNED)
+        return paginate(self.session, query, Contracts.id, limit, after, stream)
 
-    def list_all_due_contracts(self):
-        return self.session.execute(db.select(Contracts).where(Contracts.due_amount > 0)).scalars().all()
+    def list_all_due_contracts(self, limit=None, after=None, profile=None, stream=False):
+        query = self._select(profile).where(Contracts.due_amount > 0)
+        return paginate(self.session, query, Contracts.id, limit, after, stream)
 
     def create_contract(self, **kwargs):
         contract = Contracts(**kwargs)
         self.session.add(contract)
-        self.session.commit()
+        self.session.flush()
         return contract
 
+    def bulk_create_contracts(self, rows):
+        return bulk_create(self.session, Contracts, rows)
+
+    def bulk_update_contracts(self, rows):
+        bulk_update(self.session, Contracts, rows)
+
+    def bulk_delete_contracts(self, ids):
+        return bulk_delete(self.session, Contracts, ids, ())
+
+    def rows_by_id(self, ids):
+        return rows_by_id(self.session, Contracts, ids)
+
+    def existing_ids(self, ids):
+        query = db.select(Contracts.id).where(Contracts.id.in_(ids))
+        return set(self.session.execute(query).scalars())
+
+    def export_rows(self, columns, batch_size):
+        return stream_columns(self.session, Contracts, columns, batch_size)
+
     def save_to_db(self):
-        self.session.commit()
+        self.session.flush()
 
     def delete(self, contract_id):
-        contract = self.get_by_id(contract_id)
-        if contract:
-            self.session.delete(contract)
-            self.save_to_db()
-            return True
-        return False
+        return bulk_delete(self.session, Contracts, [contract_id]) > 0
+
+
+class AsyncContractRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_by_id(self, id, profile=None):
+        pass_query = ContractRepository._select(profile).where(Contracts.id == id)
+        return (await self.session.execute(pass_query)).scalar_one_or_none()
+
+    async def list_all_contracts(self, limit=None, after=None, profile=None):
+        query = ContractRepository._select(profile)
+        return await async_paginate(self.session, query, Contracts.id, limit, after)
@@ -1,38 +1,118 @@
 import sqlalchemy as db
+from sqlalchemy.orm import selectinload
 
-from models.models import Events
+from models.models import Clients, Contracts, Events, Users
+from repositories.bulk import (bulk_create, bulk_delete, bulk_update,
+                               rows_by_id)
+from repositories.pagination import async_paginate, paginate
+from repositories.profiles import select_profile
+from repositories.streaming import stream_columns
+from repositories.users.user_repository import with_permissions
+
+
+def event_table_rows():
+    clients = Clients.__table__
+    contracts = Contracts.__table__
+    contract_id = (
+        db.select(db.func.min(contracts.c.id))
+        .where(contracts.c.event_id == Events.id)
+        .scalar_subquery()
+    )
+    return (
+        db.select(
+            Events.id,
+            contract_id.label("contract_id"),
+            clients.c.full_name.label("client_name"),
+            clients.c.email.label("client_email"),
+            clients.c.telephone.label("client_telephone"),
+            Events.start,
+            Events.end,
+            Users.name.label("support_name"),
+            Events.location,
+            Events.attendees,
+            Events.notes,
+        )
+        .select_from(Events)
+        .outerjoin(clients, clients.c.id == Events.client_id)
+        .outerjoin(Users, Users.id == Events.user_id)
+    )
 
 
 class EventRepository:
+    loading_profiles = {
+        "api-detail": [
+            with_permissions(selectinload(Events.user)),
+            with_permissions(selectinload(Events.client).selectinload(Clients.user)),
+            with_permissions(selectinload(Events.contract).selectinload(Contracts.user)),
+            with_permissions(selectinload(Events.contract).selectinload(
+                Contracts.client).selectinload(Clients.user)),
+        ],
+    }
+
+    projections = {"table": event_table_rows}
+
     def __init__(self, session):
         self.session = session
 
-    def get_by_id(self, id):
-        pass_query = db.select(Events).where(Events.id == id)
+    @classmethod
+    def _select(cls, profile=None):
+        return select_profile(Events, cls.loading_profiles, profile, cls.projections)
+
+    def get_by_id(self, id, profile=None):
+        pass_query = self._select(profile).where(Events.id == id)
         return self.session.execute(pass_query).scalar_one_or_none()
 
-    def list_all_events(self):
-        return self.session.execute(db.select(Events)).scalars().all()
+    def list_all_events(self, limit=None, after=None, profile=None, stream=False):
+        return paginate(self.session, self._select(profile), Events.id, limit, after, stream)
 
-    def list_user_events(self, user_id):
-        return self.session.execute(db.select(Events).where(Events.user_id == user_id)).scalars().all()
+    def list_user_events(self, user_id, limit=None, after=None, profile=None, stream=False):
+        query = self._select(profile).where(Events.user_id == user_id)
+        return paginate(self.session, query, Events.id, limit, after, stream)
 
-    def list_no_support_events(self):
-        return self.session.execute(db.select(Events).where(Events.user_id is None)).scalars().all()
+    def list_no_support_events(self, limit=None, after=None, profile=None, stream=False):
+        query = self._select(profile).where(Events.user_id.is_(None))
+        return paginate(self.session, query, Events.id, limit, after, stream)
 
     def create_event(self, **kwargs):
         event = Events(**kwargs)
         self.session.add(event)
-        self.session.commit()
+        self.session.flush()
         return event
 
+    def bulk_create_events(self, rows):
+        return bulk_create(self.session, Events, rows)
+
+    def bulk_update_events(self, rows):
+        bulk_update(self.session, Events, rows)
+
+    def bulk_delete_events(self, ids):
+        return bulk_delete(self.session, Events, ids, (Contracts.event_id,))
+
+    def rows_by_id(self, ids):
+        return rows_by_id(self.session, Events, ids)
+
+    def existing_ids(self, ids):
+        query = db.select(Events.id).where(Events.id.in_(ids))
+        return set(self.session.execute(query).scalars())
+
+    def export_rows(self, columns, batch_size):
+        return stream_columns(self.session, Events, columns, batch_size)
+
     def save_to_db(self):
-        self.session.commit()
+        self.session.flush()
 
     def delete(self, event_id):
-        event = self.get_by_id(event_id)
-        if event:
-            self.session.delete(event)
-            self.save_to_db()
-            return True
-        return False
+        return bulk_delete(self.session, Events, [event_id], (Contracts.event_id,)) > 0
+
+
+class AsyncEventRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_by_id(self, id, profile=None):
+        pass_query = EventRepository._select(profile).where(Events.id == id)
+        return (await self.session.execute(pass_query)).scalar_one_or_none()
+
+    async def list_all_events(self, limit=None, after=None, profile=None):
+        query = EventRepository._select(profile)
+        return await async_paginate(self.session, query, Events.id, limit, after)
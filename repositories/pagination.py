@@ -0,0 +1,54 @@
+from typing import NamedTuple, Optional
+
+# No SQLAlchemy import here: the CLI imports this module at startup.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_STREAM_BATCH = 1000
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[int] = None
+
+
+def keyset_query(query, column, limit=None, after=None):
+    # Keyset pagination: the cursor is the last `column` value of the previous
+    # page, so every page is an index range scan whatever its depth.
+    query = query.order_by(column)
+    if after is not None:
+        query = query.where(column > after)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def build_page(items, column, limit=None):
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        return Page(items, getattr(items[-1], column.key))
+    return Page(items)
+
+
+def _items(result, query):
+    # Entity queries yield objects, column projections yield named rows.
+    return result.all() if len(query.column_descriptions) > 1 else result.scalars().all()
+
+
+def stream_page(session, query, column, after=None, batch_size=DEFAULT_STREAM_BATCH):
+    # Every row after `after`, fetched lazily in batches from a server-side
+    # cursor: the page items are an iterator and there is no next cursor.
+    query = keyset_query(query, column, after=after).execution_options(yield_per=batch_size)
+    result = session.execute(query)
+    return Page(result if len(query.column_descriptions) > 1 else result.scalars())
+
+
+def paginate(session, query, column, limit=None, after=None, stream=False):
+    if stream:
+        return stream_page(session, query, column, after)
+    result = session.execute(keyset_query(query, column, limit, after))
+    return build_page(_items(result, query), column, limit)
+
+
+async def async_paginate(session, query, column, limit=None, after=None):
+    result = await session.execute(keyset_query(query, column, limit, after))
+    return build_page(_items(result, query), column, limit)
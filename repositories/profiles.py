@@ -0,0 +1,26 @@
+import sqlalchemy as db
+
+
+def select_profile(model, profiles, profile, projections=None):
+    # A projection profile replaces the entity query by a select of just the
+    # columns a consumer displays, returning named rows instead of objects.
+    if projections and profile in projections:
+        return projections[profile]()
+    return with_profile(db.select(model), profiles, profile)
+
+
+def projection_columns(projections, profile):
+    return list(projections[profile]().selected_columns.keys())
+
+
+def with_profile(query, profiles, profile):
+    # Named loading profiles map a consumer ("table", "api-detail") to the
+    # eager-loading options it needs, so a listing costs a fixed number of
+    # queries instead of one lazy load per row and relationship.
+    if profile is None:
+        return query
+    try:
+        options = profiles[profile]
+    except KeyError:
+        raise ValueError(f"Profil de chargement inconnu : {profile}")
+    return query.options(*options)
@@ -0,0 +1,119 @@
+import sqlalchemy as db
+
+from db_config.report_summary import (contract_totals, has_report_summary,
+                                      rebuild_statements)
+from models.models import Clients, Contracts, ContractStatusEnum, Users
+
+
+def month_of(column, dialect):
+    if dialect == "sqlite":
+        return db.func.strftime("%Y-%m", column)
+    return db.func.to_char(column, "YYYY-MM")
+
+
+def live_facts(dialect):
+    # One row per contract, with the same columns as `contract_totals`.
+    return db.select(
+        Contracts.user_id,
+        Contracts.client_id,
+        month_of(Contracts.creation_date, dialect).label("month"),
+        db.literal(1).label("contract_count"),
+        db.func.coalesce(Contracts.amount, 0).label("total_amount"),
+        db.case((Contracts.status == ContractStatusEnum.SIGNED, db.func.coalesce(Contracts.amount, 0)),
+                else_=0).label("signed_amount"),
+        db.func.coalesce(Contracts.due_amount, 0).label("due_amount"),
+    ).subquery("facts")
+
+
+def summary_facts():
+    totals = contract_totals.c
+    return db.select(
+        db.func.nullif(totals.user_id, 0).label("user_id"),
+        db.func.nullif(totals.client_id, 0).label("client_id"),
+        db.func.nullif(totals.month, "").label("month"),
+        totals.contract_count,
+        totals.total_amount,
+        totals.signed_amount,
+        totals.due_amount,
+    ).select_from(contract_totals).subquery("facts")
+
+
+def _measures(facts):
+    return [
+        db.func.sum(facts.c.contract_count).label("contract_count"),
+        db.func.sum(facts.c.total_amount).label("total_amount"),
+        db.func.sum(facts.c.signed_amount).label("signed_amount"),
+        db.func.sum(facts.c.due_amount).label("due_amount"),
+    ]
+
+
+def _ranked(facts, key, label):
+    signed = db.func.sum(facts.c.signed_amount)
+    return (
+        db.select(
+            key.label("key"),
+            label.label("label"),
+            *_measures(facts),
+            db.func.rank().over(order_by=signed.desc()).label("rank"),
+            (signed * 1.0 / db.func.nullif(db.func.sum(signed).over(), 0)).label("signed_share"),
+        )
+        .group_by(key, label)
+        .having(db.func.sum(facts.c.contract_count) > 0)
+        .order_by(signed.desc(), key)
+    )
+
+
+def by_commercial(facts):
+    return _ranked(facts, facts.c.user_id, Users.name).outerjoin_from(
+        facts, Users, Users.id == facts.c.user_id)
+
+
+def by_client(facts):
+    clients = Clients.__table__
+    return _ranked(facts, facts.c.client_id, clients.c.full_name).outerjoin_from(
+        facts, clients, clients.c.id == facts.c.client_id)
+
+
+def by_month(facts):
+    signed = db.func.sum(facts.c.signed_amount)
+    return (
+        db.select(
+            facts.c.month.label("key"),
+            facts.c.month.label("label"),
+            *_measures(facts),
+            db.func.sum(signed).over(order_by=facts.c.month).label("cumulative_signed"),
+        )
+        .group_by(facts.c.month)
+        .having(db.func.sum(facts.c.contract_count) > 0)
+        .order_by(facts.c.month)
+    )
+
+
+REPORTS = {"commercials": by_commercial, "clients": by_client, "months": by_month}
+
+
+class ReportRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def _read_connection(self):
+        # The connection the session's SELECTs run on, not a new checkout.
+        return self.session.connection(bind_arguments={"clause": db.select(1)})
+
+    def has_summary(self):
+        return has_report_summary(self._read_connection())
+
+    def report(self, name, limit=None, live=False):
+        if live or not self.has_summary():
+            dialect = self._read_connection().dialect.name
+            facts, source = live_facts(dialect), "live"
+        else:
+            facts, source = summary_facts(), "summary"
+        query = REPORTS[name](facts)
+        if limit is not None:
+            query = query.limit(limit)
+        return self.session.execute(query).all(), source
+
+    def rebuild_summary(self):
+        for statement in rebuild_statements():
+            self.session.execute(db.text(statement))
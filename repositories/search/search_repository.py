@@ -0,0 +1,65 @@
+import re
+
+import sqlalchemy as db
+
+from models.models import Clients, Events
+from repositories.pagination import Page
+
+SEARCHABLE = ("clients", "events")
+
+
+def match_expression(text):
+    # Every word becomes a quoted prefix term ("kev" finds "Kevin"), ANDed:
+    # raw user input never reaches the FTS5 query syntax.
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def _ranked(fts, table, resource, title, detail, match, limit):
+    # FTS5 sorts by its hidden `rank` column (bm25) itself; each side only
+    # returns the rows the requested page can need.
+    index = db.table(fts, db.column("rowid"))
+    return (
+        db.select(
+            db.literal(resource).label("resource"),
+            table.c.id,
+            title.label("title"),
+            detail.label("detail"),
+            db.literal_column(f"{fts}.rank").label("rank"),
+        )
+        .select_from(index.join(table, table.c.id == index.c.rowid))
+        .where(db.literal_column(fts).op("MATCH")(match))
+        .order_by(db.literal_column(f"{fts}.rank"))
+        .limit(limit)
+        .subquery()
+    )
+
+
+class SearchRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def search(self, text, resources=SEARCHABLE, limit=20, offset=0):
+        if self.session.get_bind(clause=db.select(1)).dialect.name != "sqlite":
+            raise ValueError("La recherche plein texte n'est disponible que sur SQLite (FTS5).")
+        match = match_expression(text)
+        if not match or not resources:
+            return Page([])
+
+        clients = Clients.__table__
+        events = Events.__table__
+        window = offset + limit + 1
+        sides = []
+        if "clients" in resources:
+            sides.append(_ranked("clients_fts", clients, "client", clients.c.full_name,
+                                 clients.c.company_name, match, window))
+        if "events" in resources:
+            snippet = db.func.snippet(db.literal_column("events_fts"), -1, "[", "]", "…", 12)
+            sides.append(_ranked("events_fts", events, "event", events.c.location, snippet, match, window))
+
+        query = db.union_all(*(db.select(side) for side in sides)).subquery()
+        rows = self.session.execute(
+            db.select(query).order_by(query.c.rank).limit(limit + 1).offset(offset)
+        ).all()
+        if len(rows) > limit:
+            return Page(rows[:limit], offset + limit)
+        return Page(rows)
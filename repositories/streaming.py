@@ -0,0 +1,15 @@
+import sqlalchemy as db
+
+from repositories.pagination import DEFAULT_STREAM_BATCH
+
+
+def column_names(model):
+    return [attr.key for attr in db.inspect(model).column_attrs]
+
+
+def stream_columns(session, model, columns, batch_size=DEFAULT_STREAM_BATCH):
+    # Plain column tuples fetched batch_size rows at a time from a server-side
+    # cursor (yield_per implies stream_results): memory stays flat whatever
+    # the table size, and no ORM identity map is built.
+    query = db.select(*(getattr(model, name) for name in columns)).order_by(model.id)
+    return session.execute(query.execution_options(yield_per=batch_size))
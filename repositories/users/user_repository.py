@@ -1,9 +1,29 @@
 import sqlalchemy as db
+from sqlalchemy.orm import selectinload
 
-from models.models import Permissions, Users
+from models.models import (Permissions, Roles, Users,
+                           roles_permissions_association,
+                           users_permissions_association)
+from repositories.profiles import select_profile
+
+
+def with_permissions(loader):
+    # The overrides of each user plus its role: roles are a handful of rows,
+    # loaded once and shared by every user of the department.
+    return loader.options(
+        selectinload(Users.permissions),
+        selectinload(Users.role).selectinload(Roles.permissions),
+    )
 
 
 class UserRepository:
+    loading_profiles = {
+        "api-detail": [
+            selectinload(Users.permissions),
+            selectinload(Users.role).selectinload(Roles.permissions),
+        ],
+    }
+
     def __init__(self, session):
         self.session = session
 
@@ -18,10 +38,32 @@ class UserRepository:
         pass_query = db.select(Users).where(Users.id == id, Users.username == username)
         return self.session.execute(pass_query).scalar_one_or_none()
 
-    def get_by_id(self, id):
-        pass_query = db.select(Users).where(Users.id == id)
+    @classmethod
+    def _select(cls, profile=None):
+        return select_profile(Users, cls.loading_profiles, profile)
+
+    def get_by_id(self, id, profile=None):
+        pass_query = self._select(profile).where(Users.id == id)
         return self.session.execute(pass_query).scalar_one_or_none()
 
+    @staticmethod
+    def _permission_pairs_query(user_id):
+        # Effective permissions: those of the user's role joined through its
+        # department, plus its own overrides.
+        pairs = db.select(Permissions.resource_type, Permissions.permission_type)
+        roles = roles_permissions_association
+        overrides = users_permissions_association
+        return db.union(
+            pairs.join(roles, roles.c.permission_id == Permissions.id)
+            .join(Users, Users.department == roles.c.department)
+            .where(Users.id == user_id),
+            pairs.join(overrides, overrides.c.permission_id == Permissions.id)
+            .where(overrides.c.user_id == user_id),
+        )
+
+    def list_permission_pairs(self, user_id):
+        return self.session.execute(self._permission_pairs_query(user_id)).all()
+
     def bulk_update_permissions(self, user: Users, permissions_list: list):
         conds = [
             (Permissions.permission_type == perm_type)
@@ -31,16 +73,73 @@ class UserRepository:
         query = db.select(Permissions).where(db.or_(*conds))
         perm_list = self.session.execute(query).scalars().all()
         user.permissions.update(perm_list)
-        self.session.commit()
+        self.session.flush()
+
+    def permission_ids(self):
+        query = db.select(Permissions.permission_type, Permissions.resource_type, Permissions.id)
+        return {(ptype, rtype): id for ptype, rtype, id in self.session.execute(query)}
+
+    def add_missing_permissions(self, pairs):
+        existing = self.permission_ids()
+        missing = [
+            {"permission_type": ptype, "resource_type": rtype}
+            for ptype, rtype in pairs
+            if (ptype, rtype) not in existing
+        ]
+        if missing:
+            self.session.execute(db.insert(Permissions), missing)
+        return len(missing)
+
+    def add_missing_roles(self, departments):
+        existing = set(self.session.execute(db.select(Roles.department)).scalars())
+        missing = [{"department": department} for department in departments if department not in existing]
+        if missing:
+            self.session.execute(db.insert(Roles), missing)
+        return len(missing)
+
+    def add_missing_role_permissions(self, grants):
+        # `grants` is a list of (department, permission_id) pairs, inserted in
+        # a single INSERT ... SELECT that skips the rows already present, so
+        # running it again adds nothing.
+        if not grants:
+            return 0
+        mapping = db.union_all(*(
+            db.select(db.literal(department, Roles.department.type).label("department"),
+                      db.literal(permission_id).label("permission_id"))
+            for department, permission_id in grants
+        )).subquery("grants")
+        roles = roles_permissions_association
+        existing = db.select(roles.c.department).where(
+            roles.c.department == mapping.c.department,
+            roles.c.permission_id == mapping.c.permission_id,
+        )
+        rows = db.select(mapping.c.department, mapping.c.permission_id).where(~existing.exists())
+        insert = roles.insert().from_select(["department", "permission_id"], rows)
+        return self.session.execute(insert).rowcount
+
+    def prune_permissions(self):
+        # Drops the per-user rows that the user's role already grants.
+        overrides = users_permissions_association
+        roles = roles_permissions_association
+        granted = (
+            db.select(Users.id)
+            .join(roles, roles.c.department == Users.department)
+            .where(Users.id == overrides.c.user_id, roles.c.permission_id == overrides.c.permission_id)
+        )
+        return self.session.execute(overrides.delete().where(granted.exists())).rowcount
 
     def create_user(self, **kwargs):
         user = Users(**kwargs)
         self.session.add(user)
-        self.session.commit()
+        self.session.flush()
         return user
 
+    def existing_ids(self, ids):
+        query = db.select(Users.id).where(Users.id.in_(ids))
+        return set(self.session.execute(query).scalars())
+
     def save_to_db(self):
-        self.session.commit()
+        self.session.flush()
 
     def delete(self, user_id):
         user = self.get_by_id(user_id)
@@ -48,4 +147,21 @@ class UserRepository:
             self.session.delete(user)
             self.save_to_db()
             return True
-        return False
\ No newline at end of file
+        return False
+
+
+class AsyncUserRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_by_id_and_username(self, id, username):
+        pass_query = db.select(Users).where(Users.id == id, Users.username == username)
+        return (await self.session.execute(pass_query)).scalar_one_or_none()
+
+    async def get_by_id(self, id, profile=None):
+        pass_query = UserRepository._select(profile).where(Users.id == id)
+        return (await self.session.execute(pass_query)).scalar_one_or_none()
+
+    async def list_permission_pairs(self, user_id):
+        query = UserRepository._permission_pairs_query(user_id)
+        return (await self.session.execute(query)).all()
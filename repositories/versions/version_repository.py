@@ -0,0 +1,52 @@
+import sqlalchemy as db
+
+from models.models import Resources, ResourceVersions
+
+
+def versions_query(resource_types):
+    return db.select(ResourceVersions.resource_type, ResourceVersions.version).where(
+        ResourceVersions.resource_type.in_(resource_types))
+
+
+def modified_date_query(resource_type, id):
+    return db.select(Resources.modified_date).where(Resources.id == id, Resources.type == resource_type.value)
+
+
+def ordered_versions(rows, resource_types):
+    found = dict(rows)
+    return [found.get(resource_type, 0) for resource_type in resource_types]
+
+
+class VersionRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def bump(self, *resource_types):
+        # Runs in the caller's transaction: the new version is committed
+        # together with the write it stands for.
+        for resource_type in resource_types:
+            updated = self.session.execute(
+                db.update(ResourceVersions)
+                .where(ResourceVersions.resource_type == resource_type)
+                .values(version=ResourceVersions.version + 1)
+            )
+            if not updated.rowcount:
+                self.session.add(ResourceVersions(resource_type=resource_type, version=1))
+
+    def versions(self, resource_types):
+        return ordered_versions(self.session.execute(versions_query(resource_types)).all(), resource_types)
+
+    def modified_date(self, resource_type, id):
+        return self.session.execute(modified_date_query(resource_type, id)).scalar_one_or_none()
+
+
+class AsyncVersionRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def versions(self, resource_types):
+        rows = (await self.session.execute(versions_query(resource_types))).all()
+        return ordered_versions(rows, resource_types)
+
+    async def modified_date(self, resource_type, id):
+        return (await self.session.execute(modified_date_query(resource_type, id))).scalar_one_or_none()
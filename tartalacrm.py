@@ -1,40 +1,107 @@
-import sentry_sdk
 import getpass
 import os
+import time
+from contextlib import contextmanager
 from datetime import date
-from functools import wraps
+from functools import cached_property, wraps
 
 import click
-import jwt
-from rich import box
-from rich.console import Console
-from rich.table import Table
 
 import utils as utils
-from db_config.connexion import session
-from domain.client_app import ClientApp
-from domain.contract_app import ContractApp
-from domain.event_app import EventApp
-from domain.user_app import UserApp
-from models.models import DepartmentEnum
-from populate import Populator
+from repositories.pagination import DEFAULT_PAGE_SIZE
+
+# Only click and the light modules above are imported at startup: SQLAlchemy,
+# the models, rich, jwt and sentry are imported by the commands that use them,
+# so `--help` or a usage error never pay for them.
 
 secret = os.environ.get("JWT_SECRET")
-populator = Populator(session)
-user_app = UserApp()
-client_app = ClientApp()
-event_app = EventApp()
-contract_app = ContractApp()
+RESOURCES = ['clients', 'events', 'contracts']
+
+
+class CrmContext:
+    def __init__(self, ctx):
+        self.ctx = ctx
+
+    @cached_property
+    def session(self):
+        from db_config.connexion import session_scope
+
+        # One session per command, closed (and rolled back on error) on exit.
+        return self.ctx.with_resource(session_scope())
+
+    @cached_property
+    def user_app(self):
+        from domain.user_app import UserApp
+        return UserApp(self.session)
+
+    @cached_property
+    def client_app(self):
+        from domain.client_app import ClientApp
+        return ClientApp(self.session)
+
+    @cached_property
+    def event_app(self):
+        from domain.event_app import EventApp
+        return EventApp(self.session)
+
+    @cached_property
+    def contract_app(self):
+        from domain.contract_app import ContractApp
+        return ContractApp(self.session)
+
+    @cached_property
+    def import_app(self):
+        from domain.import_app import ImportApp
+        return ImportApp(self.session)
+
+    @cached_property
+    def export_app(self):
+        from domain.export_app import ExportApp
+        return ExportApp(self.session)
+
+    @cached_property
+    def report_app(self):
+        from domain.report_app import ReportApp
+        return ReportApp(self.session)
+
+    @cached_property
+    def search_app(self):
+        from domain.search_app import SearchApp
+        return SearchApp(self.session)
 
 
 @click.group()
-def entry_point():
-    pass
+@click.option("--sql-stats", is_flag=True,
+              help="Affiche en fin de commande le nombre de requêtes SQL et le temps passé en base.")
+@click.pass_context
+def entry_point(ctx, sql_stats):
+    ctx.obj = CrmContext(ctx)
+    if sql_stats:
+        from db_config.connexion import track_queries
+
+        stats = track_queries()
+        ctx.call_on_close(lambda: click.echo(
+            f"{stats.count} requête(s) SQL, {stats.duration * 1000:.1f} ms en base.", err=True))
+
+
+@contextmanager
+def password_hashing():
+    # A saturated or timed-out argon2 pool is a temporary condition: tell
+    # the user to retry instead of printing a traceback.
+    from domain.hashing import HashingOverloadedError
+
+    try:
+        yield
+    except HashingOverloadedError:
+        raise click.ClickException("Serveur occupé, merci de réessayer dans quelques instants.")
 
 
 def authenticated_command(f):
     @wraps(f)
-    def wrapper(*args, **kwargs):
+    @click.pass_obj
+    def wrapper(crm, *args, **kwargs):
+        import jwt
+
         content = ""
         if os.path.exists(".tartalacrm_config"):
             with open(".tartalacrm_config", "r") as file:
@@ -66,25 +133,30 @@ def authenticated_command(f):
             raise click.ClickException(
                 f"Votre token n'est pas dans un format valide. Merci d'utiliser la commande 'login' pour vous connecter.")
         else:
-            user = user_app.jwt_authentification(
+            user = crm.user_app.jwt_authentification(
                 payload["id"], payload["username"])
             if not user:
                 raise click.ClickException("Utilisateur inconnu")
             else:
-                print("Bienvenue dans TartalaCRM !")
-                return f(*args, **kwargs, user=user)
+                # stderr, so that commands writing data to stdout stay pipeable.
+                click.echo("Bienvenue dans TartalaCRM !", err=True)
+                return f(crm, *args, **kwargs, user=user)
     return wrapper
 
 
 @entry_point.command()
-def login():
+@click.pass_obj
+def login(crm):
+    import jwt
+
     username = None
     while not username:
         username = input(
             "Veuillez renseigner votre nom d'utilisateur (ne peut être vide): "
         )
     password = getpass.getpass("Veuillez renseigner votre mot de passe: ")
-    user = user_app.authentification(username, password)
+    with password_hashing():
+        user = crm.user_app.authentification(username, password)
     if not user:
         raise click.ClickException(
             "Désolé, votre utilisateur ou mot de passe n'est pas connu. Veuillez recommencer."
@@ -98,71 +170,121 @@ def login():
 
 
 @entry_point.command("list_items")
-@click.argument("items", type=click.Choice(['clients', 'events', 'contracts']))
+@click.argument("items", type=click.Choice(RESOURCES))
+@click.option("--page-size", type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True,
+              help="Nombre de lignes affichées (format table).")
+@click.option("--after", type=int, default=None,
+              help="Identifiant après lequel reprendre l'affichage (curseur de la page précédente).")
+@click.option("--format", "fmt", type=click.Choice(["table", "tsv", "csv", "jsonl"]), default="table",
+              show_default=True,
+              help="table : une page, dans un pager ; tsv, csv, jsonl : toutes les lignes, écrites au fil de l'eau.")
+@click.option("--filter", "filter", default=None,
+              help="Filtre d'affichage des événements et contrats (demandé si absent, en format table).")
+@click.option("--pager/--no-pager", default=None,
+              help="Affiche le tableau dans un pager (par défaut quand la sortie est un terminal).")
 @authenticated_command
-def list_items(items, user):
+def list_items(crm, items, page_size, after, fmt, filter, pager, user):
     if not user:
         raise click.ClickException("Utilisateur inconnu")
 
+    match items:
+        case "events":
+            filters = [e.value for e in utils.BasicFilters] + [e.value for e in crm.event_app.EventFilters]
+        case "contracts":
+            filters = [e.value for e in utils.BasicFilters] + [e.value for e in crm.contract_app.ContractFilters]
+        case _:
+            filters = None
+    if filters and filter is None:
+        # Machine-readable output must not be interleaved with a prompt.
+        filter = utils.BasicFilters.ALL.value if fmt != "table" else click.prompt(
+            "Filtre d'affichage",
+            type=click.Choice(filters),
+            default=utils.BasicFilters.ALL.value
+        )
+    elif filters and filter not in filters:
+        raise click.BadParameter(f"choisir parmi : {', '.join(filters)}", param_hint="--filter")
+
+    if fmt != "table":
+        list_as_stream(crm, items, filter, after, fmt, user)
+        return
+
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+
     now = f"Tableau généré le {date.today()}"
     table = Table(title=items.capitalize(), box=box.ROUNDED,
                   caption=now, caption_justify="left")
 
     match items:
         case "clients":
-            client_app.add_client_column_to_table(table)
+            next_cursor = crm.client_app.add_client_column_to_table(table, page_size, after)
         case "events":
-            filter = click.prompt(
-                "Filtre d'affichage",
-                type=click.Choice(
-                    [e.value for e in utils.BasicFilters] +
-                    [e.value for e in event_app.EventFilters]
-                ),
-                default=utils.BasicFilters.ALL.value
-            )
-            event_app.add_event_column_to_table(user, filter, table)
+            next_cursor = crm.event_app.add_event_column_to_table(user, filter, table, page_size, after)
         case "contracts":
-            filter = click.prompt(
-                "Filtre d'affichage",
-                type=click.Choice(
-                    [e.value for e in utils.BasicFilters] +
-                    [e.value for e in contract_app.ContractFilters]
-                ),
-                default=utils.BasicFilters.ALL.value
-            )
-            contract_app.add_contract_column_to_table(user, filter, table)
+            next_cursor = crm.contract_app.add_contract_column_to_table(user, filter, table, page_size, after)
 
     console = Console()
-    console.print(table, justify="left")
+    if pager is None:
+        pager = console.is_terminal
+    if pager:
+        with console.pager(styles=True):
+            console.print(table, justify="left")
+    else:
+        console.print(table, justify="left")
+    if next_cursor is not None:
+        print(f"Page suivante : list_items {items} --after {next_cursor}")
+
+
+def list_as_stream(crm, items, filter, after, fmt, user):
+    from domain.export_app import FORMATTERS
+
+    # Rows come off a server-side cursor and are written as they arrive:
+    # output starts at once and memory stays flat whatever the row count.
+    match items:
+        case "clients":
+            app = crm.client_app
+            rows, _ = app.list_client_rows(after=after, stream=True)
+        case "events":
+            app = crm.event_app
+            rows, _ = app.list_event_rows(user, filter, after=after, stream=True)
+        case "contracts":
+            app = crm.contract_app
+            rows, _ = app.list_contract_rows(user, filter, after=after, stream=True)
+
+    output = click.get_text_stream("stdout")
+    for chunk in FORMATTERS[fmt](rows, app.row_columns()):
+        output.write(chunk)
 
 
 @entry_point.command("create_item")
 @click.argument("item_type", type=click.Choice(['client', 'event', 'contract', 'user']))
 @authenticated_command
-def create_item(item_type, user):
-    if not user_app.has_permission(user=user, resource_type=item_type, permission_type="create"):
+def create_item(crm, item_type, user):
+    if not crm.user_app.has_permission(user=user, resource_type=item_type, permission_type="create"):
         print("Vous n'êtes pas autorisé à créer cette ressource.")
         return
 
     match item_type:
         case "user":
             user_dict = utils.prompt_user()
-            user = user_app.create(**user_dict)
+            with password_hashing():
+                user = crm.user_app.create(**user_dict)
             print(f"Utilisateur {user.id} créé avec succès.")
         case "client":
             client_dict = utils.prompt_client()
             client_dict["user"] = user
-            client = client_app.create(**client_dict)
+            client = crm.client_app.create(**client_dict)
             print(f"Client {client.id} créé avec succès.")
         case "event":
             event_dict = utils.prompt_event()
             event_dict["user"] = user
-            event = event_app.create(**event_dict)
+            event = crm.event_app.create(**event_dict)
             print(f"Evénement {event.id} créé avec succès.")
         case "contract":
             contract_dict = utils.prompt_contract()
             contract_dict["user"] = user
-            contract = contract_app.create(**contract_dict)
+            contract = crm.contract_app.create(**contract_dict)
             print(f"Contrat {contract.id} créé avec succès")
 
 
@@ -170,14 +292,16 @@ def create_item(item_type, user):
 @click.argument("item_type", type=click.Choice(['client', 'event', 'contract', 'user']))
 @click.argument("item_id", type=int)
 @authenticated_command
-def update_item(item_type, item_id, user):
-    if not user_app.has_permission(user=user, resource_type=item_type, permission_type="update"):
+def update_item(crm, item_type, item_id, user):
+    from models.models import DepartmentEnum
+
+    if not crm.user_app.has_permission(user=user, resource_type=item_type, permission_type="update"):
         print("Vous n'êtes pas autorisé à modifier cette ressource.")
         return
 
     match item_type:
         case "user":
-            user = user_app.get_by_id(item_id)
+            user = crm.user_app.get_by_id(item_id)
             if not user:
                 print(f"L'utilisateur {item_id} n'existe pas.")
                 return
@@ -188,11 +312,11 @@ def update_item(item_type, item_id, user):
                 "department": user.department.value
             }
             updated_user_dict = utils.prompt_user(user_dict)
-            user = user_app.update(id=item_id, **updated_user_dict)
+            user = crm.user_app.update(id=item_id, **updated_user_dict)
             print(f"Utilisateur {user.id} modifié avec succès.")
 
         case "client":
-            client = client_app.get_by_id(item_id)
+            client = crm.client_app.get_by_id(item_id)
             if not client:
                 print(f"Le client {item_id} n'existe pas.")
                 return
@@ -207,11 +331,11 @@ def update_item(item_type, item_id, user):
                 "company_name": client.company_name,
             }
             updated_client_dict = utils.prompt_client(default=client_dict)
-            client = client_app.update(id=item_id, **updated_client_dict)
+            client = crm.client_app.update(id=item_id, **updated_client_dict)
             print(f"Client {client.id} modifié avec succès.")
 
         case "event":
-            event = event_app.get_by_id(item_id)
+            event = crm.event_app.get_by_id(item_id)
             if not event:
                 print(f"L'événement {item_id} n'existe pas.")
                 return
@@ -228,16 +352,16 @@ def update_item(item_type, item_id, user):
                 "client_id": event.client_id,
             }
             updated_event_dict = utils.prompt_event(default=event_dict)
-            event = event_app.update(id=item_id, **updated_event_dict)
+            event = crm.event_app.update(id=item_id, **updated_event_dict)
             print(f"Evénement {event.id} modifié avec succès.")
 
         case "contract":
-            contract = contract_app.get_by_id(item_id)
+            contract = crm.contract_app.get_by_id(item_id)
             if not contract:
                 print(f"Le contrat {item_id} n'existe pas.")
                 return
             if user.department.value == DepartmentEnum.COMMERCIAL.value:
-                client = client_app.get_by_id(contract.client_id)
+                client = crm.client_app.get_by_id(contract.client_id)
                 if not client.user_id == user.id:
                     print(
                         "Vous n'êtes pas autorisé à créer un contrat pour un client dont vous n'êtes pas responsables.")
@@ -251,7 +375,7 @@ def update_item(item_type, item_id, user):
                 "event_id": contract.event_id,
             }
             updated_contract_dict = utils.prompt_contract(contract_dict)
-            contract = contract_app.update(id=item_id, **updated_contract_dict)
+            contract = crm.contract_app.update(id=item_id, **updated_contract_dict)
             print(f"Contrat {contract.id} modifié avec succès")
 
 
@@ -259,14 +383,14 @@ def update_item(item_type, item_id, user):
 @click.argument("item_type", type=click.Choice(['client', 'event', 'contract', 'user']))
 @click.argument("item_id", type=int)
 @authenticated_command
-def delete_item(item_type, item_id, user):
-    if not user_app.has_permission(user=user, resource_type=item_type, permission_type="delete"):
+def delete_item(crm, item_type, item_id, user):
+    if not crm.user_app.has_permission(user=user, resource_type=item_type, permission_type="delete"):
         print("Vous n'êtes pas autorisé à supprimer cette ressource.")
         return
 
     match item_type:
         case "user":
-            to_del_user = user_app.get_by_id(item_id)
+            to_del_user = crm.user_app.get_by_id(item_id)
             if not to_del_user:
                 print(f"L'utilisateur {item_id} n'existe pas.")
                 return
@@ -275,11 +399,11 @@ def delete_item(item_type, item_id, user):
                     f"Vous ne pouvez pas supprimer une ressource dont vous n'êtes pas propriétaire.")
                 return
             if click.confirm(f"Êtes-vous sûr de vouloir supprimer l'utilisateur {user.id} {user.username} ?", default=False):
-                deleted = user_app.delete(item_id)
+                deleted = crm.user_app.delete(item_id)
                 if deleted:
                     print("Utilisateur supprimé avec succès.")
         case "client":
-            client = client_app.get_by_id(item_id)
+            client = crm.client_app.get_by_id(item_id)
             if not client:
                 print(f"Le client {item_id} n'existe pas.")
                 return
@@ -288,11 +412,11 @@ def delete_item(item_type, item_id, user):
                     f"Vous ne pouvez pas supprimer une ressource dont vous n'êtes pas propriétaire.")
                 return
             if click.confirm(f"Êtes-vous sûr de vouloir supprimer le client {client.id} {client.full_name} ?", default=False):
-                deleted = client_app.delete(item_id)
+                deleted = crm.client_app.delete(item_id)
                 if deleted:
                     print("Client supprimé avec succès.")
         case "event":
-            event = event_app.get_by_id(item_id)
+            event = crm.event_app.get_by_id(item_id)
             if not event:
                 print(f"L'événement {item_id} n'existe pas.")
                 return
@@ -301,11 +425,11 @@ def delete_item(item_type, item_id, user):
                     f"Vous ne pouvez pas supprimer une ressource dont vous n'êtes pas propriétaire.")
                 return
             if click.confirm(f"Êtes-vous sûr de vouloir supprimer l'événement {event.id} qui se déroule à {event.location} ?", default=False):
-                deleted = event_app.delete(item_id)
+                deleted = crm.event_app.delete(item_id)
                 if deleted:
                     print("Evénement supprimé avec succès.")
         case "contract":
-            contract = contract_app.get_by_id(item_id)
+            contract = crm.contract_app.get_by_id(item_id)
             if not contract:
                 print(f"Le contrat {item_id} n'existe pas.")
                 return
@@ -314,23 +438,209 @@ def delete_item(item_type, item_id, user):
                     f"Vous ne pouvez pas supprimer une ressource dont vous n'êtes pas propriétaire.")
                 return
             if click.confirm(f"Êtes-vous sûr de vouloir supprimer l'événement {contract.id} ?", default=False):
-                deleted = contract_app.delete(item_id)
+                deleted = crm.contract_app.delete(item_id)
                 if deleted:
                     print("Contrat supprimé avec succès.")
 
 
+@entry_point.command("import")
+@click.argument("resource", type=click.Choice(RESOURCES))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="Format du fichier (déduit de l'extension par défaut).")
+@click.option("--batch-size", type=click.IntRange(min=1), default=None,
+              help="Nombre de lignes insérées par transaction (1000 par défaut).")
+@click.option("--start-line", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Ligne à partir de laquelle reprendre un import interrompu.")
+@authenticated_command
+def import_items(crm, resource, path, fmt, batch_size, start_line, user):
+    from domain.import_app import DEFAULT_BATCH_SIZE, ImportApp
+
+    if not crm.user_app.has_permission(user=user, resource_type=resource[:-1], permission_type="create"):
+        print("Vous n'êtes pas autorisé à créer cette ressource.")
+        return
+
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        report = crm.import_app.import_file(
+            resource, file, fmt or ImportApp.detect_format(path), user.id,
+            batch_size or DEFAULT_BATCH_SIZE, start_line)
+
+    print(f"{report.inserted} ligne(s) importée(s), {report.error_count} erreur(s).")
+    for line_number, message in report.errors:
+        print(f"  ligne {line_number} : {message}")
+    print(f"Dernière ligne lue : {report.last_line} (reprise : --start-line {report.last_line + 1})")
+
+
+@entry_point.command("export")
+@click.argument("resource", type=click.Choice(RESOURCES))
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "csv"]), default="ndjson", show_default=True)
+@click.option("--columns", default=None, help="Colonnes à exporter, séparées par des virgules (toutes par défaut).")
+@click.option("--output", "-o", type=click.File("w", encoding="utf-8", lazy=True), default="-",
+              help="Fichier de sortie (sortie standard par défaut).")
+@authenticated_command
+def export_items(crm, resource, fmt, columns, output, user):
+    if not crm.user_app.has_permission(user=user, resource_type=resource[:-1], permission_type="read"):
+        raise click.ClickException("Vous n'êtes pas autorisé à lire cette ressource.")
+
+    try:
+        chunks = crm.export_app.export(resource, fmt, columns.split(",") if columns else None)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--columns")
+    for chunk in chunks:
+        output.write(chunk)
+
+
+@entry_point.command()
+@click.argument("text")
+@click.option("--in", "resources", type=click.Choice(["clients", "events"]), multiple=True,
+              help="Ressource(s) à interroger (toutes celles lisibles par défaut).")
+@click.option("--page-size", type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True)
+@click.option("--offset", type=click.IntRange(min=0), default=0, show_default=True,
+              help="Position de départ (curseur de la page précédente).")
+@authenticated_command
+def search(crm, text, resources, page_size, offset, user):
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+
+    readable = [name for name in (resources or crm.search_app.RESOURCES)
+                if crm.user_app.has_permission(user=user, resource_type=name[:-1], permission_type="read")]
+    if not readable:
+        raise click.ClickException("Vous n'êtes pas autorisé à lire ces ressources.")
+
+    try:
+        results, next_cursor = crm.search_app.search(text, readable, page_size, offset)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+    table = Table(title=f"Recherche : {text}", box=box.ROUNDED)
+    for column in ("Type", "Id", "Titre", "Extrait", "Score"):
+        table.add_column(column)
+    for result in results:
+        table.add_row(result.resource, str(result.id), result.title or "", result.detail or "",
+                      f"{-result.rank:.3g}")
+    Console().print(table, justify="left")
+    if next_cursor is not None:
+        print(f"Page suivante : search {text!r} --offset {next_cursor}")
+
+
+REPORT_TITLES = {
+    "commercials": ("Chiffre d'affaires par commercial", "Commercial"),
+    "clients": ("Chiffre d'affaires par client", "Client"),
+    "months": ("Chiffre d'affaires par mois", "Mois"),
+}
+
+
+@entry_point.command()
+@click.argument("name", type=click.Choice(list(REPORT_TITLES)))
+@click.option("--limit", type=click.IntRange(min=1), default=None,
+              help="Nombre de lignes affichées (toutes par défaut).")
+@click.option("--format", "fmt", type=click.Choice(["table", "tsv", "csv", "jsonl"]), default="table",
+              show_default=True)
+@click.option("--live", is_flag=True, help="Calcule depuis les contrats sans passer par la table de synthèse.")
+@click.option("--rebuild-summary", is_flag=True, help="Recalcule la table de synthèse avant le rapport.")
+@authenticated_command
+def report(crm, name, limit, fmt, live, rebuild_summary, user):
+    if not crm.user_app.has_permission(user=user, resource_type="contract", permission_type="read"):
+        raise click.ClickException("Vous n'êtes pas autorisé à lire les contrats.")
+    if rebuild_summary:
+        try:
+            crm.report_app.rebuild_summary()
+        except ValueError as error:
+            raise click.ClickException(str(error))
+
+    lines, source = crm.report_app.report(name, limit, live)
+
+    if fmt != "table":
+        from domain.export_app import FORMATTERS
+
+        output = click.get_text_stream("stdout")
+        for chunk in FORMATTERS[fmt](lines, list(lines[0]._fields) if lines else []):
+            output.write(chunk)
+        return
+
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+
+    title, label = REPORT_TITLES[name]
+    source = "table de synthèse" if source == "summary" else "calcul direct"
+    table = Table(title=title, box=box.ROUNDED, caption=f"Généré le {date.today()} ({source})",
+                  caption_justify="left")
+    table.add_column(label, style="cyan")
+    table.add_column("Contrats", justify="right")
+    table.add_column("Montant total", justify="right", style="magenta")
+    table.add_column("Montant signé", justify="right", style="green")
+    table.add_column("Restant à payer", justify="right", style="magenta")
+    table.add_column("Cumul signé" if name == "months" else "Rang / part", justify="right")
+    for line in lines:
+        extra = (f"{line.cumulative_signed} €" if name == "months"
+                 else f"{line.rank} / {(line.signed_share or 0):.1%}")
+        table.add_row(line.label or "-", str(line.contract_count), f"{line.total_amount} €",
+                      f"{line.signed_amount} €", f"{line.due_amount} €", extra)
+    Console().print(table, justify="left")
+
+
+@entry_point.command()
+@click.pass_obj
+def migrate(crm):
+    from db_config.connexion import engine
+    from db_config.migrations import create_schema
+    from db_config.migrations import migrate as migrate_schema
+
+    tables = create_schema(engine)
+    if tables:
+        print(f"Tables créées : {', '.join(tables)}")
+    created, dropped, before, after = migrate_schema(engine)
+    if dropped:
+        print(f"Index supprimés : {', '.join(dropped)}")
+    if created:
+        print(f"Index créés : {', '.join(created)}")
+    elif not dropped:
+        print("Aucun index manquant, la base est à jour.")
+    # Roles are reference data: a fresh database gets them without `populate`.
+    added, removed = crm.user_app.sync_roles()
+    if added or removed:
+        print(f"{added} permission(s) de rôle ajoutée(s), {removed} permission(s) individuelle(s) supprimée(s).")
+
+    for name in before:
+        print(f"\n{name}")
+        print(f"  avant : {' | '.join(before[name])}")
+        print(f"  après : {' | '.join(after[name])}")
+
+
 # TODO: remove after dev phase is over
 @entry_point.command()
-def populate():
-    populator.populate()
+@click.option("--scale", type=click.IntRange(min=1), default=None,
+              help="Génère N clients, événements et contrats de test en masse.")
+@click.option("--seed", type=int, default=0, show_default=True,
+              help="Graine du générateur, pour obtenir des données reproductibles.")
+@click.pass_obj
+def populate(crm, scale, seed):
+    from populate import SCALE_PASSWORD, Populator
+
+    populator = Populator(crm.session)
+    if scale is None:
+        added, removed = populator.populate()
+        print(f"{added} permission(s) de rôle ajoutée(s), {removed} permission(s) individuelle(s) supprimée(s).")
+        return
+
+    started = time.perf_counter()
+    users, resources = populator.populate_scale(scale, seed)
+    print(f"{users} utilisateurs, {resources} clients, événements et contrats créés "
+          f"en {time.perf_counter() - started:.1f} s (mot de passe : {SCALE_PASSWORD}).")
 
 
 if __name__ == "__main__":
-    sentry_sdk.init(
-        dsn=os.environ.get("SENTRY_DSN"),
-        # Add request headers and IP for users,
-        # see https://docs.sentry.io/platforms/python/data-management/data-collected/ for more info
-        send_default_pii=True,
-    )
+    # Without a DSN the SDK is a no-op: skip its (slow) import altogether.
+    if os.environ.get("SENTRY_DSN"):
+        import sentry_sdk
+
+        sentry_sdk.init(
+            dsn=os.environ.get("SENTRY_DSN"),
+            # Add request headers and IP for users,
+            # see https://docs.sentry.io/platforms/python/data-management/data-collected/ for more info
+            send_default_pii=True,
+        )
 
     entry_point()
@@ -6,8 +6,6 @@ import string
 
 import click
 
-from models.models import ContractStatusEnum, DepartmentEnum
-
 
 class BasicFilters(enum.Enum):
     ALL = "Tout voir"
@@ -119,6 +117,8 @@ def prompt_event(default: dict = None):
 
 
 def prompt_contract(default: dict = None):
+    from models.models import ContractStatusEnum
+
     amount = click.prompt(
         "Montant du contrat",
         type=int,
@@ -154,6 +154,8 @@ def prompt_contract(default: dict = None):
 
 
 def prompt_user(default: dict = None):
+    from models.models import DepartmentEnum
+
     name = click.prompt(
         "Nom",
         type=str,